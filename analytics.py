@@ -0,0 +1,327 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Bootstrap-Stichproben und Konfidenzniveau der Konsistenz-Analyse
+bootstrap_resamples = 1000
+bootstrap_confidence = 0.95
+
+# Obergrenze gezogener Werte je Block (Stichproben x Bewertungen), begrenzt den Speicher
+bootstrap_block_cells = 2 ** 22
+
+# Ab so vielen Design Principles werden die Intervalle in einem Prozess-Pool berechnet
+bootstrap_parallel_min_groups = 5000
+
+# Worker starten frisch (forkserver/spawn) statt als fork-Kopie des mehrfädigen Streamlit-Servers
+bootstrap_start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _usable_cpus():
+    """Dem Prozess zugeteilte CPUs (Affinität, z. B. in Containern), sonst alle"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+# Einträge je Liste im Bereich "Top/Low Performer"
+priority_top_k = 10
+priority_columns = ['name', 'category', 'relevanz', 'dringlichkeit', 'priority_score']
+
+# Quadranten der 2x2 Matrix, Code = 2 x (Dringlichkeit hoch) + (Relevanz hoch)
+quadrant_labels = [
+    "Wenig Dringlich / Wenig Relevant",
+    "Wenig Dringlich / Sehr Relevant",
+    "Hoch Dringlich / Wenig Relevant",
+    "Hoch Dringlich / Sehr Relevant"
+]
+quadrant_threshold_methods = ['Fest', 'Median', 'Mittelwert']
+default_quadrant_threshold = 5.0
+
+
+class RatingMoments(NamedTuple):
+    """Laufende Anzahl, Mittelwerte und Abweichungsquadratsummen je Design Principle.
+
+    `mean` und `m2` haben die Form (DP x Merkmale). Die Varianz ergibt sich als
+    `m2 / (count - 1)`, ohne dass die einzelnen Bewertungen vorliegen müssen.
+    """
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+
+
+def empty_moments(n_groups, n_features=2):
+    return RatingMoments(np.zeros(n_groups, dtype=np.int64), np.zeros((n_groups, n_features)),
+                         np.zeros((n_groups, n_features)))
+
+
+def rating_moments(n_groups, group_ids, values):
+    """Momente eines Stapels von Bewertungen (`values`: Bewertungen x Merkmale) je Gruppe"""
+    values = np.asarray(values, dtype=float)
+    count = np.bincount(group_ids, minlength=n_groups)
+    divisor = np.maximum(count, 1)[:, None]
+    mean = np.stack([np.bincount(group_ids, weights=values[:, k], minlength=n_groups)
+                     for k in range(values.shape[1])], axis=1) / divisor
+    deviation = (values - mean[group_ids]) ** 2
+    m2 = np.stack([np.bincount(group_ids, weights=deviation[:, k], minlength=n_groups)
+                   for k in range(values.shape[1])], axis=1)
+    return RatingMoments(count, mean, m2)
+
+
+def merge_moments(moments, batch):
+    """Fasst bisherige Momente mit denen eines neuen Stapels zusammen (Welford, paarweise nach Chan).
+
+    Die Mittelwerte werden über die Differenz der Stapelmittel verschoben statt
+    aus Quadratsummen berechnet, das bleibt auch bei vielen Stapeln numerisch
+    stabil. `batch` darf mehr Gruppen haben (neue Design Principles).
+    """
+    n_groups = len(batch.count)
+    previous = empty_moments(n_groups, batch.mean.shape[1])
+    previous.count[:len(moments.count)] = moments.count
+    previous.mean[:len(moments.count)] = moments.mean
+    previous.m2[:len(moments.count)] = moments.m2
+
+    count = previous.count + batch.count
+    divisor = np.maximum(count, 1)[:, None]
+    delta = batch.mean - previous.mean
+    mean = previous.mean + delta * (batch.count[:, None] / divisor)
+    m2 = previous.m2 + batch.m2 + delta ** 2 * (previous.count * batch.count)[:, None] / divisor
+    return RatingMoments(count, mean, m2)
+
+
+def moment_std(moments):
+    """Stichproben-Standardabweichung je Gruppe, NaN bei weniger als zwei Bewertungen"""
+    variance = moments.m2 / np.maximum(moments.count - 1, 1)[:, None]
+    return np.where(moments.count[:, None] > 1, np.sqrt(variance), np.nan)
+
+
+def _bootstrap_block(values, sizes, resamples, quantiles, seed):
+    """Perzentil-Intervalle der Mittelwerte für einen Block aufeinanderfolgender Gruppen.
+
+    `values` (Bewertungen x Merkmale) ist nach Gruppe sortiert, `sizes` enthält
+    die Gruppengrößen. Alle Stichproben eines Blocks werden als eine
+    Indexmatrix (Stichproben x Bewertungen) gezogen.
+    """
+    rng = np.random.default_rng(seed)
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    row_start = np.repeat(starts, sizes)
+    row_size = np.repeat(sizes, sizes)
+
+    positions = row_start + (rng.random((resamples, len(values))) * row_size).astype(np.int64)
+    means = np.add.reduceat(values[positions], starts, axis=1) / sizes[None, :, None]
+    return np.quantile(means, quantiles, axis=0)
+
+
+def bootstrap_mean_ci(values, group_ids, resamples=None, confidence=None, parallel=None, seed=0):
+    """Bootstrap-Konfidenzintervalle der Mittelwerte je Gruppe.
+
+    `values` hat die Form (Bewertungen x Merkmale), `group_ids` nummeriert die
+    Gruppen von 0 an lückenlos. Die Gruppen werden in Blöcke mit höchstens
+    `bootstrap_block_cells` gezogenen Werten aufgeteilt. Mit `parallel=True`
+    (Standard ab `bootstrap_parallel_min_groups` Gruppen und mehr als einer
+    nutzbaren CPU) laufen die Blöcke in einem Prozess-Pool mit
+    `bootstrap_start_method`, auch aus der App heraus.
+    Liefert untere und obere Grenzen (Gruppen x Merkmale).
+    """
+    if resamples is None:
+        resamples = bootstrap_resamples
+    if confidence is None:
+        confidence = bootstrap_confidence
+    values = np.asarray(values, dtype=float)
+    n_groups = int(group_ids.max()) + 1 if len(group_ids) else 0
+    if parallel is None:
+        parallel = n_groups >= bootstrap_parallel_min_groups and _usable_cpus() > 1
+
+    order = np.argsort(group_ids, kind='stable')
+    values = values[order]
+    sizes = np.bincount(group_ids, minlength=n_groups)
+    alpha = (1 - confidence) / 2
+    quantiles = [alpha, 1 - alpha]
+
+    # Gruppen zu Blöcken zusammenfassen, deren Ziehungen in den Speicherrahmen passen
+    rows_per_block = max(bootstrap_block_cells // resamples, 1)
+    group_ends = np.cumsum(sizes)
+    blocks = []
+    first = 0
+    while first < n_groups:
+        limit = (group_ends[first - 1] if first else 0) + rows_per_block
+        last = max(int(np.searchsorted(group_ends, limit, side='right')), first + 1)
+        blocks.append((first, last))
+        first = last
+
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+    tasks = [(values[(group_ends[first - 1] if first else 0):group_ends[last - 1]], sizes[first:last],
+              resamples, quantiles, block_seed) for (first, last), block_seed in zip(blocks, seeds)]
+
+    if parallel and len(tasks) > 1:
+        context = multiprocessing.get_context(bootstrap_start_method)
+        with ProcessPoolExecutor(max_workers=min(len(tasks), _usable_cpus()), mp_context=context) as pool:
+            results = list(pool.map(_bootstrap_block, *zip(*tasks)))
+    else:
+        results = [_bootstrap_block(*task) for task in tasks]
+
+    if not results:
+        empty = np.empty((0, values.shape[1]))
+        return empty, empty
+    bounds = np.concatenate(results, axis=1)
+    return bounds[0], bounds[1]
+
+
+def compute_consistency(viz_df, selected_dp_names, resamples=None, parallel=None):
+    """Standardabweichung der Bewertungen je Design Principle über die Quellen.
+
+    Ein groupby-Durchlauf liefert Anzahl, Mittelwert und Streuung; dazu kommen
+    Bootstrap-Konfidenzintervalle der mittleren Relevanz und Dringlichkeit.
+    """
+    selected = viz_df[viz_df['name'].isin(selected_dp_names)]
+    names = selected['name'].astype(str).to_numpy()
+    stats = pd.DataFrame({
+        'name': names,
+        'relevanz': selected['relevanz'].to_numpy(dtype=float),
+        'dringlichkeit': selected['dringlichkeit'].to_numpy(dtype=float)
+    }).groupby('name', sort=False).agg(
+        count=('relevanz', 'size'),
+        relevanz_mean=('relevanz', 'mean'),
+        relevanz_std=('relevanz', 'std'),
+        dringlichkeit_mean=('dringlichkeit', 'mean'),
+        dringlichkeit_std=('dringlichkeit', 'std')
+    )
+    stats = stats[stats['count'] > 1]
+    if stats.empty:
+        return pd.DataFrame()
+
+    # Bootstrap nur für DPs mit mehreren Bewertungen
+    group_ids = pd.Index(stats.index).get_indexer(names)
+    rows = group_ids >= 0
+    lower, upper = bootstrap_mean_ci(
+        selected[['relevanz', 'dringlichkeit']].to_numpy(dtype=float)[rows], group_ids[rows],
+        resamples=resamples, parallel=parallel
+    )
+
+    consistency_df = pd.DataFrame({
+        'Design Principle': stats.index,
+        'Anzahl Quellen': stats['count'].to_numpy(),
+        'Relevanz Std': stats['relevanz_std'].to_numpy(),
+        'Dringlichkeit Std': stats['dringlichkeit_std'].to_numpy(),
+        'Gesamt Konsistenz': ((stats['relevanz_std'] + stats['dringlichkeit_std']) / 2).to_numpy(),
+        'Relevanz Mittel': stats['relevanz_mean'].to_numpy(),
+        'Relevanz KI unten': lower[:, 0],
+        'Relevanz KI oben': upper[:, 0],
+        'Dringlichkeit Mittel': stats['dringlichkeit_mean'].to_numpy(),
+        'Dringlichkeit KI unten': lower[:, 1],
+        'Dringlichkeit KI oben': upper[:, 1]
+    })
+    return consistency_df.sort_values('Gesamt Konsistenz', kind='stable')
+
+
+class PriorityIndex(NamedTuple):
+    """Nach Prioritäts-Score (Relevanz x Dringlichkeit) sortierte Zeilenpositionen der Plotdaten.
+
+    Alle Reihenfolgen sind stabil, gleiche Scores behalten die Zeilenreihenfolge
+    wie bei `nlargest`/`nsmallest`. `by_category` ordnet nach Kategorie und
+    darin absteigend nach Score; `category_rank` ist der Rang innerhalb der
+    Kategorie in dieser Reihenfolge.
+    """
+    score: np.ndarray
+    descending: np.ndarray
+    ascending: np.ndarray
+    by_category: np.ndarray
+    category_rank: np.ndarray
+
+
+def priority_index(viz_df):
+    """Berechnet Score und Sortierungen einmal, danach kostet jede Top-k-Abfrage nur k Zeilen"""
+    score = viz_df['relevanz'].to_numpy() * viz_df['dringlichkeit'].to_numpy()
+    codes = viz_df['category'].cat.codes.to_numpy()
+    by_category = np.lexsort((-score, codes))
+    sorted_codes = codes[by_category]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, len(codes)]))
+    return PriorityIndex(
+        score=score,
+        descending=np.argsort(-score, kind='stable'),
+        ascending=np.argsort(score, kind='stable'),
+        by_category=by_category,
+        category_rank=np.arange(len(codes)) - group_start
+    )
+
+
+def _priority_rows(viz_df, index, positions):
+    # Nur die ausgewählten Zeilen kopieren, die Plotdaten selbst bleiben unverändert
+    rows = viz_df.iloc[positions]
+    return rows.assign(priority_score=index.score[positions])[priority_columns]
+
+
+def top_priorities(viz_df, index, k=None):
+    """Die k Zeilen mit dem höchsten Score"""
+    if k is None:
+        k = priority_top_k
+    return _priority_rows(viz_df, index, index.descending[:k])
+
+
+def low_priorities(viz_df, index, k=None):
+    """Die k Zeilen mit dem niedrigsten Score"""
+    if k is None:
+        k = priority_top_k
+    return _priority_rows(viz_df, index, index.ascending[:k])
+
+
+def top_priorities_by_category(viz_df, index, k=None):
+    """Die k Zeilen mit dem höchsten Score je Kategorie, nach Kategorie geordnet"""
+    if k is None:
+        k = priority_top_k
+    return _priority_rows(viz_df, index, index.by_category[index.category_rank < k])
+
+
+class QuadrantThresholds(NamedTuple):
+    """Grenzen der Quadranten; Werte ab der Grenze zählen als hoch"""
+    dringlichkeit: float = default_quadrant_threshold
+    relevanz: float = default_quadrant_threshold
+
+
+def quadrant_thresholds(viz_df, method=None, fixed=None):
+    """Grenzen fest (`fixed`, sonst 5/5) oder aus Median bzw. Mittelwert der Punkte der Ansicht"""
+    if method in (None, 'Fest') or viz_df.empty:
+        return fixed if fixed is not None else QuadrantThresholds()
+    reduce = np.median if method == 'Median' else np.mean
+    return QuadrantThresholds(float(reduce(viz_df['dringlichkeit'].to_numpy())),
+                              float(reduce(viz_df['relevanz'].to_numpy())))
+
+
+def classify_quadrants(viz_df, thresholds):
+    """Quadranten-Code (0-3, siehe `quadrant_labels`) je Punkt in einer Array-Operation"""
+    high_dringlichkeit = viz_df['dringlichkeit'].to_numpy() >= thresholds.dringlichkeit
+    high_relevanz = viz_df['relevanz'].to_numpy() >= thresholds.relevanz
+    return (2 * high_dringlichkeit + high_relevanz).astype(np.int8)
+
+
+def quadrant_counts(viz_df, quadrants, by='category'):
+    """Punkte je Gruppe (`by`: 'category' oder 'source') und Quadrant, mit Summenzeile"""
+    codes, groups = pd.factorize(viz_df[by], sort=True)
+    counts = np.bincount(codes * len(quadrant_labels) + quadrants,
+                         minlength=len(groups) * len(quadrant_labels)).reshape(len(groups), len(quadrant_labels))
+    table = pd.DataFrame(counts, index=pd.Index(groups.astype(str), name=by), columns=quadrant_labels)
+    table.loc['Gesamt'] = table.sum()
+    return table
+
+
+def quadrant_members(viz_df, quadrants, by='category'):
+    """Design Principles je Gruppe und Quadrant als Liste (eine Zeile je besetzter Kombination).
+
+    Duplikate und Sortierung laufen über ganzzahlige Schlüssel aus Gruppe,
+    Quadrant und Namenscode, Zeichenketten entstehen erst beim Verbinden.
+    """
+    n_quadrants = len(quadrant_labels)
+    group_codes, groups = pd.factorize(viz_df[by], sort=True)
+    name_codes, names = pd.factorize(viz_df['name'], sort=True)
+    keys = np.unique((group_codes.astype(np.int64) * n_quadrants + quadrants) * len(names) + name_codes)
+    cells, starts = np.unique(keys // len(names), return_index=True)
+    member_names = np.asarray(names.astype(str), dtype=object)[keys % len(names)]
+    return pd.DataFrame({
+        by: np.asarray(groups.astype(str), dtype=object)[cells // n_quadrants],
+        'Quadrant': pd.Categorical.from_codes(cells % n_quadrants, categories=quadrant_labels),
+        'Anzahl DPs': np.diff(np.r_[starts, len(keys)]),
+        'Design Principles': [', '.join(chunk) for chunk in np.split(member_names, starts[1:])]
+    })
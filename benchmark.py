@@ -0,0 +1,198 @@
+"""Laufzeitmessung der Verarbeitungsschritte mit synthetischen Daten, ohne Streamlit.
+
+Der Generator erzeugt Korpora im Format von `design_principles_data` (Spalten
+`name`, `category`, `<quelle>_relevanz`, `<quelle>_dringlichkeit`) mit
+wählbarer Zahl an DPs, Quellen, Kategorien und Besetzungsdichte. Jeder Schritt
+der App wird einzeln gemessen, die Ergebnisse werden als JSON ausgegeben:
+
+    python benchmark.py --dps 100 1000 10000 --sources 6 12 --density 0.7 --output ergebnisse.json
+"""
+import argparse
+import json
+import platform
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from analytics import (QuadrantThresholds, classify_quadrants, compute_consistency, low_priorities, priority_index,
+                       quadrant_counts, quadrant_members, top_priorities)
+from figures import build_density_figure, build_evolution_figure, build_histogram_figure, build_matrix_figure
+from processing import (binned_counts, category_colors, compact_design_principles, compute_category_stats,
+                        density_grid, evolution_view, prepare_grouped_visualization_data,
+                        prepare_visualization_data, ratings_from_wide)
+from ranking import rank_aggregation
+from storage import convert_design_principles, read_dataset
+
+# Standardwerte der Messreihe
+benchmark_dps = [100, 1000, 10000]
+benchmark_sources = [6]
+benchmark_density = 0.7
+benchmark_categories = 6
+benchmark_repeat = 3
+
+
+def synthetic_sources(n_sources):
+    """Quellkennungen wie in data.py: Workshop und fortlaufende Interviews"""
+    return ['workshop'] + [f"I{i}" for i in range(1, n_sources)]
+
+
+def synthetic_categories(n_categories):
+    """Die bekannten Kategorien, bei Bedarf um nummerierte ergänzt"""
+    known = list(category_colors)
+    return known[:n_categories] + [f"Kategorie {i}" for i in range(len(known) + 1, n_categories + 1)]
+
+
+def synthetic_design_principles(n_dp, n_sources, density=None, n_categories=None, seed=0):
+    """Erzeugt ein DataFrame im Format von `design_principles_data`.
+
+    Jede Zelle (DP, Quelle) ist mit Wahrscheinlichkeit `density` bewertet,
+    sonst None. Die Bewertungen liegen auf Halbpunkten und streuen um eine
+    DP-eigene Grundbewertung, damit wie in den echten Daten gleiche
+    Koordinaten mehrerer Quellen vorkommen.
+    """
+    if density is None:
+        density = benchmark_density
+    if n_categories is None:
+        n_categories = benchmark_categories
+    rng = np.random.default_rng(seed)
+    categories = synthetic_categories(n_categories)
+    sources = synthetic_sources(n_sources)
+
+    columns = {
+        'name': [f"DP {i:06d}" for i in range(n_dp)],
+        'category': np.array(categories, dtype=object)[rng.integers(0, n_categories, n_dp)]
+    }
+    base = rng.integers(4, 17, size=(n_dp, 2))
+    for source in sources:
+        rated = rng.random(n_dp) < density
+        for k, feature in enumerate(['relevanz', 'dringlichkeit']):
+            values = np.clip(base[:, k] + rng.integers(-3, 4, n_dp), 0, 20) / 2
+            column = values.astype(object)
+            column[~rated] = None
+            columns[f"{source}_{feature}"] = column
+    return pd.DataFrame(columns)
+
+
+def _measure(function, repeat):
+    """Führt `function` `repeat`-mal aus und liefert Ergebnis und Laufzeiten in Sekunden"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def benchmark_corpus(raw_df, repeat=None):
+    """Misst alle Schritte der App für ein Korpus, jeder Schritt mit den Ergebnissen des vorigen"""
+    if repeat is None:
+        repeat = benchmark_repeat
+    stages = {}
+
+    def stage(name, function):
+        result, timings = _measure(function, repeat)
+        stages[name] = {'min_s': min(timings), 'median_s': float(np.median(timings))}
+        return result
+
+    df, ratings = stage('load_data', lambda: (compact_design_principles(raw_df), ratings_from_wide(raw_df)))
+    with tempfile.TemporaryDirectory() as directory:
+        convert_design_principles(raw_df, directory)
+        stage('load_parquet', lambda: read_dataset(directory))
+
+    sources = list(ratings.sources)
+    categories = df['category'].unique().tolist()
+    names = df['name'].unique().tolist()
+    stage('prepare_average', lambda: prepare_visualization_data(
+        df, sources, "Durchschnittswerte", categories, names, ratings))
+    viz_df = stage('prepare_single', lambda: prepare_visualization_data(
+        df, sources, "Einzelne Datenpunkte", categories, names, ratings))
+    grouped = stage('prepare_grouped', lambda: prepare_grouped_visualization_data(viz_df))
+
+    figure = stage('matrix_figure', lambda: build_matrix_figure(grouped, "Einzelne Datenpunkte"))
+    stage('matrix_figure_json', figure.to_json)
+    grid = stage('density_grid', lambda: density_grid(viz_df))
+    stage('density_figure', lambda: build_density_figure(grid, "Dichteansicht").to_json())
+    evolution = stage('evolution_view', lambda: evolution_view(df, ratings, sources, categories, names))
+    stage('evolution_figure', lambda: build_evolution_figure(evolution, "Entwicklung").to_json())
+
+    stage('tab_distribution', lambda: [
+        build_histogram_figure(binned_counts(viz_df, column), column, column).to_json()
+        for column in ['relevanz', 'dringlichkeit']
+    ])
+    index = stage('priority_index', lambda: priority_index(viz_df))
+    stage('tab_priority', lambda: (top_priorities(viz_df, index), low_priorities(viz_df, index)))
+    stage('tab_quadrants', lambda: [
+        function(viz_df, classify_quadrants(viz_df, QuadrantThresholds()), 'category')
+        for function in (quadrant_counts, quadrant_members)
+    ])
+    stage('tab_ranking', lambda: rank_aggregation(df, ratings, sources, categories, names))
+    stage('tab_consistency', lambda: compute_consistency(viz_df, names))
+    stage('category_stats', lambda: compute_category_stats(viz_df))
+    stage('export_csv', lambda: viz_df.to_csv(index=False))
+
+    return {
+        'n_dp': len(df),
+        'n_sources': len(sources),
+        'n_ratings': len(ratings.dp_id),
+        'n_points': len(viz_df),
+        'n_grouped': len(grouped),
+        'stages': stages
+    }
+
+
+def run_benchmark(dps=None, sources=None, density=None, n_categories=None, repeat=None, seed=0):
+    """Misst alle Kombinationen aus DP- und Quellenzahl und liefert ein JSON-fähiges Ergebnis"""
+    if dps is None:
+        dps = benchmark_dps
+    if sources is None:
+        sources = benchmark_sources
+    if density is None:
+        density = benchmark_density
+    if n_categories is None:
+        n_categories = benchmark_categories
+
+    results = []
+    for n_sources in sources:
+        for n_dp in dps:
+            raw_df = synthetic_design_principles(n_dp, n_sources, density, n_categories, seed)
+            result = benchmark_corpus(raw_df, repeat)
+            result.update(density=density, n_categories=n_categories)
+            results.append(result)
+
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'plotly': plotly.__version__,
+            'machine': platform.machine(),
+            'repeat': repeat or benchmark_repeat,
+            'seed': seed
+        },
+        'results': results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Laufzeitmessung der Verarbeitungsschritte")
+    parser.add_argument('--dps', type=int, nargs='+', default=benchmark_dps, help="Anzahl Design Principles")
+    parser.add_argument('--sources', type=int, nargs='+', default=benchmark_sources, help="Anzahl Quellen")
+    parser.add_argument('--density', type=float, default=benchmark_density, help="Anteil bewerteter Zellen")
+    parser.add_argument('--categories', type=int, default=benchmark_categories, help="Anzahl Kategorien")
+    parser.add_argument('--repeat', type=int, default=benchmark_repeat, help="Messungen je Schritt")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="JSON-Datei für die Ergebnisse (sonst Standardausgabe)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.dps, args.sources, args.density, args.categories, args.repeat, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
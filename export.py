@@ -0,0 +1,86 @@
+"""Export der gefilterten Ansicht als CSV oder als Parquet-Paket.
+
+Beide Formate werden blockweise geschrieben: CSV in Zeilenblöcken, Parquet
+mit einer Row-Group je Block. Das Parquet-Paket ist ein ZIP-Archiv mit den
+Plotdaten, der gruppierten Ansicht und der Konsistenz-Tabelle; die Spaltentypen
+(Categoricals, float32, Quelllisten) bleiben dabei erhalten.
+"""
+import tempfile
+import zipfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Zeilen je geschriebenem Block
+export_chunk_rows = 50_000
+
+# Bis zu dieser Größe bleibt eine vorbereitete Exportdatei im Speicher, darüber liegt sie auf der Platte
+export_spool_bytes = 16 * 1024 ** 2
+
+export_formats = {
+    'CSV': ('design_principles_analysis.csv', 'text/csv'),
+    'Parquet': ('design_principles_analysis.zip', 'application/zip')
+}
+
+
+def _row_blocks(frame, chunk_rows=None):
+    if chunk_rows is None:
+        chunk_rows = export_chunk_rows
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield start, frame.iloc[start:start + chunk_rows]
+
+
+def csv_chunks(frame, chunk_rows=None):
+    """CSV-Text (UTF-8) in Blöcken, Kopfzeile im ersten Block"""
+    for start, block in _row_blocks(frame, chunk_rows):
+        yield block.to_csv(index=False, header=start == 0).encode('utf-8')
+
+
+def write_csv(frame, target, chunk_rows=None):
+    """Schreibt `frame` blockweise als CSV in die binäre Datei `target`"""
+    for chunk in csv_chunks(frame, chunk_rows):
+        target.write(chunk)
+
+
+def write_parquet(frame, target, chunk_rows=None):
+    """Schreibt `frame` blockweise als Parquet, eine Row-Group je Block.
+
+    Das Schema stammt aus dem ersten Block; Categoricals behalten in jedem
+    Block alle Kategorien, die Dictionary-Typen stimmen also überein.
+    """
+    writer = None
+    try:
+        for _, block in _row_blocks(frame, chunk_rows):
+            table = pa.Table.from_pandas(block, schema=writer.schema if writer else None, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(target, table.schema, compression='zstd')
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_parquet_bundle(view, target, chunk_rows=None):
+    """Schreibt Plotdaten, gruppierte Ansicht und Konsistenz-Tabelle als ZIP mit drei Parquet-Dateien"""
+    tables = {
+        'plotdaten.parquet': view.viz_df,
+        'gruppiert.parquet': view.grouped_viz_df,
+        'konsistenz.parquet': view.consistency_df
+    }
+    # Parquet ist bereits komprimiert, das Archiv speichert die Dateien unverändert
+    with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name, frame in tables.items():
+            if len(frame.columns):
+                with archive.open(name, 'w', force_zip64=True) as entry:
+                    write_parquet(frame, entry, chunk_rows)
+
+
+def export_file(view, export_format):
+    """Bereitet die Exportdatei vor und liefert sie als gelesene Datei ab Position 0"""
+    target = tempfile.SpooledTemporaryFile(max_size=export_spool_bytes)
+    if export_format == 'Parquet':
+        write_parquet_bundle(view, target)
+    else:
+        write_csv(view.viz_df, target)
+    target.seek(0)
+    return target
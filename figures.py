@@ -0,0 +1,260 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from analytics import QuadrantThresholds, quadrant_labels
+from processing import category_colors, default_color, histogram_bins
+
+# Ab dieser Punktzahl wird die Matrix mit WebGL (Scattergl) statt SVG gezeichnet
+webgl_point_threshold = 5000
+
+
+def build_histogram_figure(counts, title, axis_title, bins=None):
+    """Gestapeltes Balkendiagramm aus serverseitig gezählten Klassen (Kategorie x Klasse).
+
+    Es werden nur die Klassenhäufigkeiten übertragen, die Größe der Figur hängt
+    also nicht von der Anzahl der Bewertungen ab.
+    """
+    if bins is None:
+        bins = histogram_bins
+    centers = (bins[:-1] + bins[1:]) / 2
+    widths = np.diff(bins)
+
+    fig = go.Figure()
+    for category, row in counts.iterrows():
+        fig.add_trace(go.Bar(
+            x=centers,
+            y=row.to_numpy(),
+            width=widths,
+            name=category,
+            marker_color=category_colors.get(category, default_color),
+            customdata=np.column_stack([bins[:-1], bins[1:]]),
+            hovertemplate=f'<b>{category}</b><br>{axis_title}: %{{customdata[0]}}–%{{customdata[1]}}'
+                          '<br>Anzahl: %{y}<extra></extra>'
+        ))
+
+    fig.update_layout(
+        title=title,
+        barmode='stack',
+        bargap=0,
+        xaxis_title=axis_title,
+        yaxis_title="Anzahl",
+        xaxis=dict(range=[bins[0], bins[-1]], dtick=1),
+        legend_title_text="Kategorie",
+        height=400
+    )
+    return fig
+
+
+def matrix_hover_text(grouped_viz_df):
+    """Hover-Texte aller Punkte mit vektorisierten String-Operationen in einem Durchlauf"""
+    names = grouped_viz_df['name'].astype(str)
+    sources_text = grouped_viz_df['sources_list'].str.join(', ')
+    counts = grouped_viz_df['sources_count']
+
+    multiple = names + '<br>Quellen: ' + sources_text + '<br>(' + counts.astype(str) + ' Quellen)'
+    single = names + '<br>Quelle: ' + sources_text
+    return np.where(counts.to_numpy() > 1, multiple.to_numpy(), single.to_numpy())
+
+
+def category_index_arrays(categories):
+    """Zeilenindizes je Kategorie (Reihenfolge des ersten Auftretens) über eine stabile Sortierung"""
+    codes, uniques = pd.factorize(categories)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    return dict(zip(uniques, np.split(order, bounds)))
+
+
+def add_quadrants(fig, thresholds=None):
+    """Quadranten-Hintergrund und -Beschriftung der 2x2 Matrix an den Grenzen `thresholds` (Standard 5/5)"""
+    if thresholds is None:
+        thresholds = QuadrantThresholds()
+    x, y = thresholds.dringlichkeit, thresholds.relevanz
+    # Quadranten in der Reihenfolge der Codes aus analytics.classify_quadrants
+    quadrants = [
+        ((0, x), (0, y), "rgba(255,255,0,0.1)"),
+        ((0, x), (y, 10), "rgba(0,255,0,0.1)"),
+        ((x, 10), (0, y), "rgba(255,0,0,0.1)"),
+        ((x, 10), (y, 10), "rgba(255,0,0,0.2)")
+    ]
+    for ((x0, x1), (y0, y1), color), label in zip(quadrants, quadrant_labels):
+        # Quadranten-Hintergrund
+        fig.add_shape(
+            type="rect",
+            x0=x0, y0=y0, x1=x1, y1=y1,
+            fillcolor=color,
+            line=dict(width=0),
+            layer="below"
+        )
+        # Quadranten-Labels hinzufügen
+        fig.add_annotation(x=(x0 + x1) / 2, y=(y0 + y1) / 2, text=label.replace(" / ", "<br>"), showarrow=False,
+                           font=dict(size=14, color="gray"), bgcolor="rgba(255,255,255,0.8)")
+
+
+def _matrix_layout(fig, show_mode):
+    fig.update_layout(
+        title={
+            'text': f"Design Principles Matrix - {show_mode}",
+            'x': 0.5,
+            'font': {'size': 20}
+        },
+        xaxis_title="Dringlichkeit",
+        yaxis_title="Relevanz",
+        xaxis=dict(range=[0, 10], dtick=1, gridcolor='lightgray'),
+        yaxis=dict(range=[0, 10], dtick=1, gridcolor='lightgray'),
+        width=800,
+        height=600,
+        plot_bgcolor='white',
+        showlegend=True,
+        legend=dict(
+            orientation="v",
+            yanchor="top",
+            y=1,
+            xanchor="left",
+            x=1.02
+        )
+    )
+
+
+def build_matrix_figure(grouped_viz_df, show_mode, thresholds=None):
+    """2x2 Matrix (Dringlichkeit x Relevanz) mit einer Spur pro Kategorie"""
+    fig = go.Figure()
+    add_quadrants(fig, thresholds)
+
+    # Datenpunkte nach Kategorie gruppieren - Spalten einmal holen, dann nur per Index aufteilen
+    scatter = go.Scattergl if len(grouped_viz_df) > webgl_point_threshold else go.Scatter
+    hover_text = matrix_hover_text(grouped_viz_df)
+    x = grouped_viz_df['dringlichkeit'].to_numpy()  # x-Achse ist jetzt Dringlichkeit
+    y = grouped_viz_df['relevanz'].to_numpy()       # y-Achse ist jetzt Relevanz
+    sizes = 12 + grouped_viz_df['sources_count'].to_numpy(dtype=np.int32) * 2  # Größe basierend auf Anzahl Quellen
+
+    for category, index in category_index_arrays(grouped_viz_df['category'].to_numpy()).items():
+        fig.add_trace(scatter(
+            x=x[index],
+            y=y[index],
+            mode='markers',
+            name=category,
+            text=hover_text[index],
+            marker=dict(
+                size=sizes[index],
+                color=category_colors.get(category, default_color),
+                opacity=0.8,
+                line=dict(width=2, color='white'),
+                symbol='circle'
+            ),
+            hovertemplate='<b>%{text}</b><br>Dringlichkeit: %{x}<br>Relevanz: %{y}<extra></extra>'
+        ))
+
+    # Layout anpassen
+    _matrix_layout(fig, show_mode)
+
+    return fig
+
+
+def build_density_figure(grid, show_mode, thresholds=None):
+    """Dichteansicht der 2x2 Matrix: Heatmap der Punktzahl je Rasterzelle mit Kategorie-Aufschlüsselung.
+
+    Übertragen werden nur die Rasterzellen, die Größe der Figur ist also konstant.
+    """
+    centers = (grid.edges[:-1] + grid.edges[1:]) / 2
+
+    # Hover-Text je Zelle: Gesamtzahl plus Anzahl je Kategorie (nur Kategorien mit Punkten)
+    breakdown = np.full(grid.counts.shape, '', dtype=object)
+    for category, counts in zip(grid.categories, grid.category_counts):
+        line = np.where(counts > 0, '<br>' + category + ': ' + counts.astype(str).astype(object), '')
+        breakdown = breakdown + line
+
+    fig = go.Figure()
+    add_quadrants(fig, thresholds)
+    fig.add_trace(go.Heatmap(
+        x=centers,
+        y=centers,
+        z=np.where(grid.counts > 0, grid.counts, np.nan),
+        customdata=breakdown,
+        colorscale='Blues',
+        zmin=0,
+        colorbar=dict(title="Anzahl"),
+        hovertemplate='Dringlichkeit: %{x}<br>Relevanz: %{y}<br><b>%{z} Punkte</b>%{customdata}<extra></extra>',
+        name="Dichte"
+    ))
+    _matrix_layout(fig, show_mode)
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def build_evolution_figure(evolution, show_mode, thresholds=None):
+    """Animierte 2x2 Matrix: ein Frame je hinzugenommener Quelle, eine Spur pro Kategorie.
+
+    Die Punkte tragen den DP-Namen als id, Plotly verschiebt sie also zwischen
+    den Frames, statt sie neu zu zeichnen. Ab `webgl_point_threshold` DPs
+    (Scattergl, nicht überblendbar) wird jeder Frame neu gezeichnet. DPs ohne
+    bisherige Bewertung fehlen.
+    """
+    scatter = go.Scattergl if len(evolution.names) > webgl_point_threshold else go.Scatter
+    names = evolution.names.astype(str).astype(object)
+    categories = category_index_arrays(evolution.categories)
+
+    def traces(frame):
+        hover_text = names + '<br>Quellen bisher: ' + evolution.counts[frame].astype(str).astype(object)
+        return [scatter(
+            x=evolution.dringlichkeit[frame, index],
+            y=evolution.relevanz[frame, index],
+            ids=names[index],
+            mode='markers',
+            name=category,
+            text=hover_text[index],
+            marker=dict(
+                size=12,
+                color=category_colors.get(category, default_color),
+                opacity=0.8,
+                line=dict(width=2, color='white')
+            ),
+            hovertemplate='<b>%{text}</b><br>Dringlichkeit: %{x:.2f}<br>Relevanz: %{y:.2f}<extra></extra>'
+        ) for category, index in categories.items()]
+
+    frame_names = [f"bis {label}" for label in evolution.labels]
+    last = len(frame_names) - 1
+    fig = go.Figure(
+        data=traces(last),
+        frames=[go.Frame(data=traces(frame), name=name) for frame, name in enumerate(frame_names)]
+    )
+    add_quadrants(fig, thresholds)
+    _matrix_layout(fig, show_mode)
+
+    # Nur SVG-Spuren lassen sich überblenden, WebGL-Spuren müssen je Frame neu gezeichnet werden
+    redraw = scatter is go.Scattergl
+    step_args = dict(mode='immediate', frame=dict(duration=800, redraw=redraw), transition=dict(duration=500))
+    fig.update_layout(
+        height=700,
+        sliders=[dict(
+            active=last,
+            currentvalue=dict(prefix="Quellen "),
+            steps=[dict(label=name, method='animate', args=[[name], step_args]) for name in frame_names]
+        )],
+        updatemenus=[dict(
+            type='buttons',
+            direction='left',
+            x=0,
+            y=-0.12,
+            xanchor='left',
+            yanchor='top',
+            buttons=[
+                dict(label="▶ Abspielen", method='animate',
+                     args=[None, dict(step_args, fromcurrent=False)]),
+                dict(label="⏸ Anhalten", method='animate',
+                     args=[[None], dict(mode='immediate', frame=dict(duration=0, redraw=redraw))])
+            ]
+        )]
+    )
+    return fig
+
+
+def build_view_figure(view, thresholds=None):
+    """Matrix einer berechneten Ansicht: Dichteraster, Animation der Entwicklung oder gruppierte Punkte"""
+    if view.show_mode == "Entwicklung":
+        return build_evolution_figure(view.evolution, view.show_mode, thresholds)
+    if view.show_mode == "Dichteansicht":
+        # Punkte serverseitig in ein Raster aggregiert, Größe der Figur unabhängig von der Punktzahl
+        return build_density_figure(view.density, view.show_mode, thresholds)
+    # Daten für verbessertes Hovering gruppieren
+    return build_matrix_figure(view.grouped_viz_df, view.show_mode, thresholds)
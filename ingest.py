@@ -0,0 +1,234 @@
+"""Fortschreibendes Einlesen neuer Bewertungsdateien in den Parquet-Datensatz.
+
+Eine Datei enthält je Zeile die Bewertung eines Design Principles durch eine Quelle:
+
+    name,category,source,relevanz,dringlichkeit
+
+Unterstützt werden CSV und JSON Lines (.jsonl). `category` wird nur für neue
+Design Principles benötigt. Jeder Aufruf schreibt genau einen neuen
+Bewertungsteil; bestehende Teile werden nicht angefasst, eine laufende App
+lädt den Teil über `DatasetStore.refresh` nach.
+
+Rohexporte von Umfragen (eine Zeile je Teilnehmer und DP) werden blockweise
+gelesen und als eine neue Quelle angehängt:
+
+    respondent,name,category,relevanz,dringlichkeit
+
+Aufrufe:
+
+    python ingest.py bewertungen.csv [weitere Dateien ...]
+    python ingest.py --umfrage U1 export.csv
+"""
+import argparse
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from analytics import empty_moments, merge_moments, rating_moments
+from processing import rating_max, rating_min, rating_scale
+from storage import (dataset_exists, dataset_path, rating_parts, read_design_principles, read_rating_rows,
+                     stored_sources, write_design_principles, write_rating_rows, write_response_chunks)
+
+rating_file_columns = ['name', 'source', 'relevanz', 'dringlichkeit']
+
+survey_columns = ['respondent', 'name', 'relevanz', 'dringlichkeit']
+
+# Zeilen je Block beim Lesen von Umfrage-Exporten, bestimmt den Speicherbedarf
+survey_chunk_rows = 100_000
+
+
+def read_rating_file(path):
+    """Liest eine Bewertungsdatei (CSV oder JSON Lines) und prüft Spalten und Wertebereich"""
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        frame = pd.read_csv(path, dtype={'name': str, 'category': str, 'source': str})
+    elif path.suffix.lower() in ('.jsonl', '.ndjson'):
+        frame = pd.read_json(path, lines=True, dtype={'name': str, 'category': str, 'source': str})
+    else:
+        raise ValueError(f"{path}: unbekanntes Dateiformat (erwartet .csv oder .jsonl)")
+
+    missing = [column for column in rating_file_columns if column not in frame.columns]
+    if missing:
+        raise ValueError(f"{path}: Spalten fehlen: {', '.join(missing)}")
+    if 'category' not in frame.columns:
+        frame['category'] = None
+    return validate_ratings(frame[['name', 'category', 'source', 'relevanz', 'dringlichkeit']], path)
+
+
+def validate_ratings(frame, origin=''):
+    """Prüft Bewertungen auf den Bereich 0-10 und die gespeicherte Stufung, ungültige Zeilen führen zum Abbruch"""
+    frame = frame.assign(
+        relevanz=pd.to_numeric(frame['relevanz'], errors='coerce'),
+        dringlichkeit=pd.to_numeric(frame['dringlichkeit'], errors='coerce')
+    )
+    values = frame[['relevanz', 'dringlichkeit']].to_numpy(dtype=float)
+    invalid = (np.isnan(values) | (values < rating_min) | (values > rating_max)
+               | (values * rating_scale != np.rint(values * rating_scale))).any(axis=1)
+    invalid |= frame['name'].isna().to_numpy() | frame['source'].isna().to_numpy()
+    if invalid.any():
+        rows = np.flatnonzero(invalid)[:10].tolist()
+        raise ValueError(f"{origin}: {int(invalid.sum())} ungültige Bewertungen, z. B. in Zeilen {rows}")
+    return frame
+
+
+def ingest_ratings(frame, path=None):
+    """Hängt validierte Bewertungen als neuen Teil an den Datensatz an.
+
+    Unbekannte Design Principles werden hinten an die DP-Tabelle angefügt.
+    Bewertungen für bereits gespeicherte Paare aus DP und Quelle werden
+    abgelehnt, vorhandene Daten ändern sich nie. Liefert den Pfad des Teils.
+    """
+    if path is None:
+        path = dataset_path
+    if not dataset_exists(path):
+        raise ValueError(f"{path}: kein Datensatz vorhanden (zuerst storage.py ausführen)")
+
+    df = read_design_principles(path)
+    dp_index = pd.Index(df['name'].astype(str))
+    dp_id = dp_index.get_indexer(frame['name'])
+
+    new_rows = frame[dp_id < 0].drop_duplicates('name')
+    if len(new_rows):
+        if new_rows['category'].isna().any():
+            names = ', '.join(new_rows.loc[new_rows['category'].isna(), 'name'].head(5))
+            raise ValueError(f"Neue Design Principles ohne Kategorie: {names}")
+        df = pd.concat([df.astype(str), new_rows[['name', 'category']]], ignore_index=True)
+        dp_index = pd.Index(df['name'])
+        dp_id = dp_index.get_indexer(frame['name'])
+
+    # Nur fortschreiben: Paare aus DP und Quelle dürfen weder doppelt noch schon gespeichert sein
+    pairs = pd.MultiIndex.from_arrays([dp_id, frame['source'].to_numpy()])
+    if pairs.has_duplicates:
+        raise ValueError("Bewertungen enthalten doppelte Paare aus Design Principle und Quelle")
+    stored = read_rating_rows(rating_parts(path), frame['source'].unique().tolist())
+    stored_pairs = pd.MultiIndex.from_arrays([
+        stored.column('dp_id').to_numpy(), stored.column('source').to_pandas().astype(str).to_numpy()
+    ])
+    if pairs.isin(stored_pairs).any():
+        raise ValueError("Bewertungen für bereits gespeicherte Paare aus Design Principle und Quelle")
+
+    # DP-Tabelle vor dem Bewertungsteil schreiben, damit Leser jede dp_id auflösen können
+    if len(new_rows):
+        write_design_principles(df, path)
+    return write_rating_rows(dp_id, frame['source'].to_numpy(), frame['relevanz'].to_numpy(),
+                             frame['dringlichkeit'].to_numpy(), path)
+
+
+def ingest_rating_files(files, path=None):
+    """Liest mehrere Bewertungsdateien und hängt sie gemeinsam als einen Teil an"""
+    frame = pd.concat([read_rating_file(file) for file in files], ignore_index=True)
+    return ingest_ratings(frame, path), frame
+
+
+class SurveyImport(NamedTuple):
+    """Ergebnis eines Umfrage-Imports"""
+    part: Path
+    responses_part: Path
+    rows: int
+    rejected: int
+    design_principles: int
+
+
+def _survey_chunks(export, header, chunksize, dp_index, new_dps, state):
+    """Liest den Export blockweise, prüft die Bewertungen und schreibt die Momente je DP fort.
+
+    Liefert je Block die gültigen Antworten mit dp_id. Neue Design Principles
+    werden in `dp_index`/`new_dps` ergänzt, Zähler und Momente in `state`.
+    """
+    reader = pd.read_csv(export, chunksize=chunksize, usecols=lambda column: column in header.values(),
+                         dtype={header['respondent']: str, header['name']: str, header['category']: str})
+    for chunk in reader:
+        chunk = chunk.rename(columns={column: key for key, column in header.items()})
+        missing = [column for column in survey_columns if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"{export}: Spalten fehlen: {', '.join(header[column] for column in missing)}")
+
+        values = np.column_stack([pd.to_numeric(chunk['relevanz'], errors='coerce'),
+                                  pd.to_numeric(chunk['dringlichkeit'], errors='coerce')])
+        valid = (~np.isnan(values) & (values >= rating_min) & (values <= rating_max)).all(axis=1)
+        valid &= chunk['name'].notna().to_numpy() & chunk['respondent'].notna().to_numpy()
+        state['rows'] += len(chunk)
+        state['rejected'] += int((~valid).sum())
+        chunk, values = chunk[valid], values[valid]
+
+        unknown = chunk.loc[~chunk['name'].isin(dp_index.keys())].drop_duplicates('name')
+        for name, category in zip(unknown['name'], unknown.get('category', [None] * len(unknown))):
+            if pd.isna(category):
+                raise ValueError(f"{export}: neues Design Principle ohne Kategorie: {name}")
+            dp_index[name] = len(dp_index)
+            new_dps.append((name, category))
+
+        dp_id = chunk['name'].map(dp_index).to_numpy(np.int32)
+        state['moments'] = merge_moments(state['moments'], rating_moments(len(dp_index), dp_id, values))
+        yield pd.DataFrame({
+            'dp_id': dp_id,
+            'respondent': chunk['respondent'].to_numpy(),
+            'relevanz': values[:, 0],
+            'dringlichkeit': values[:, 1]
+        })
+
+
+def import_survey_export(export, source, path=None, columns=None, chunksize=None):
+    """Importiert einen Umfrage-Export (eine Zeile je Teilnehmer und DP) als neue Quelle.
+
+    Der Export wird in Blöcken von `chunksize` Zeilen gelesen. Bewertungen
+    außerhalb von 0-10 sowie fehlende Werte werden verworfen und gezählt.
+    Gültige Antworten landen als Einzelantworten in `responses/`, Anzahl und
+    Mittelwert je DP werden mit Welford-Updates blockweise fortgeschrieben.
+    Der Speicherbedarf hängt so nur von Blockgröße und Zahl der Design
+    Principles ab, nicht von der Dateigröße. Zum Schluss werden die
+    Mittelwerte je DP als Bewertungsteil der Quelle `source` angehängt.
+    `columns` ordnet abweichende Spaltennamen des Exports zu
+    (z. B. {'respondent': 'Teilnehmer-ID'}).
+    """
+    if path is None:
+        path = dataset_path
+    if chunksize is None:
+        chunksize = survey_chunk_rows
+    if not dataset_exists(path):
+        raise ValueError(f"{path}: kein Datensatz vorhanden (zuerst storage.py ausführen)")
+    if source in stored_sources(path):
+        raise ValueError(f"Quelle {source} ist bereits gespeichert, Bewertungen können nur ergänzt werden")
+
+    header = {column: column for column in survey_columns + ['category']}
+    header.update(columns or {})
+    df = read_design_principles(path)
+    dp_index = {name: dp for dp, name in enumerate(df['name'].astype(str))}
+    new_dps = []
+    state = {'rows': 0, 'rejected': 0, 'moments': empty_moments(len(dp_index))}
+
+    responses_part = write_response_chunks(_survey_chunks(export, header, chunksize, dp_index, new_dps, state),
+                                           source, path)
+
+    # DP-Tabelle vor dem Bewertungsteil schreiben, damit Leser jede dp_id auflösen können
+    if new_dps:
+        write_design_principles(
+            pd.concat([df.astype(str), pd.DataFrame(new_dps, columns=['name', 'category'])], ignore_index=True),
+            path
+        )
+    moments = state['moments']
+    dp_id = np.flatnonzero(moments.count > 0)
+    # Mittelwerte auf die gespeicherte Stufung runden, die RatingTable nimmt nur Werte auf den Stufen an
+    means = np.rint(moments.mean[dp_id] * rating_scale) / rating_scale
+    part = write_rating_rows(dp_id, np.full(len(dp_id), source, dtype=object), means[:, 0], means[:, 1], path,
+                             [source])
+    return SurveyImport(part, responses_part, state['rows'], state['rejected'], len(dp_id))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Neue Bewertungen an den Parquet-Datensatz anhängen")
+    parser.add_argument('files', nargs='+', help="Bewertungsdateien (.csv/.jsonl) oder ein Umfrage-Export")
+    parser.add_argument('--umfrage', metavar='QUELLE', help="Datei als Umfrage-Export der Quelle QUELLE lesen")
+    args = parser.parse_args()
+
+    if args.umfrage:
+        if len(args.files) != 1:
+            parser.error("--umfrage erwartet genau einen Export")
+        result = import_survey_export(args.files[0], args.umfrage)
+        print(f"{result.rows} Antworten gelesen, {result.rejected} verworfen, "
+              f"{result.design_principles} Design Principles nach {result.part} geschrieben")
+    else:
+        part, frame = ingest_rating_files(args.files)
+        print(f"{len(frame)} Bewertungen aus {frame['source'].nunique()} Quellen nach {part} geschrieben")
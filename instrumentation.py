@@ -0,0 +1,210 @@
+"""Optionale Messung von Laufzeit und Speicherspitzen je Verarbeitungsschritt.
+
+Schritte werden mit `stage(name)` markiert. Solange kein `StageRecorder` aktiv
+ist, kostet das nur einen Kontextvariablen-Zugriff. Der aktive Recorder hängt
+am Ausführungskontext, Streamlit-Sitzungen in eigenen Threads messen also
+getrennt. Speicherspitzen stammen aus `tracemalloc`, das prozessweit misst:
+laufen mehrere gemessene Sitzungen gleichzeitig, vermischen sich ihre Spitzen.
+Aktive Recorder werden gezählt, beendet wird tracemalloc nur, wenn keiner mehr
+misst.
+"""
+import json
+import logging
+import logging.handlers
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+import pandas as pd
+
+# Rollierende Logdatei (JSON Lines, eine Zeile je Lauf)
+stage_log_path = Path(__file__).with_name('logs') / 'stages.jsonl'
+stage_log_max_bytes = 1024 * 1024
+stage_log_backups = 5
+
+_active_recorder = ContextVar('active_recorder', default=None)
+
+# Anzahl der Recorder, die tracemalloc gerade nutzen (über alle Sitzungen)
+_tracing_users = 0
+_tracing_lock = threading.Lock()
+
+
+def _acquire_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+def _release_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+
+
+class StageRecord(NamedTuple):
+    """Ein gemessener Schritt: Verschachtelungstiefe, Laufzeit und zusätzliche Speicherspitze"""
+    name: str
+    depth: int
+    seconds: float
+    peak_bytes: int
+
+
+class _OpenStage:
+    __slots__ = ('name', 'start', 'baseline', 'peak')
+
+    def __init__(self, name, start, baseline):
+        self.name = name
+        self.start = start
+        self.baseline = baseline
+        self.peak = 0
+
+
+class StageRecorder:
+    """Sammelt die Schritte eines Laufs, wahlweise mit Speicherspitzen über tracemalloc"""
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.records = []
+        self._open = []
+        self._token = None
+        self._tracing = False
+
+    def __enter__(self):
+        self._start_tracing()
+        self._token = _active_recorder.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _active_recorder.reset(self._token)
+        self._stop_tracing()
+        return False
+
+    def _start_tracing(self):
+        if self.trace_memory and not self._tracing:
+            _acquire_tracing()
+            self._tracing = True
+
+    def _stop_tracing(self):
+        """Gibt die Nutzung von tracemalloc frei (mehrfacher Aufruf unschädlich)"""
+        if self._tracing:
+            self._tracing = False
+            _release_tracing()
+
+    def total_seconds(self):
+        """Summe der äußersten Schritte"""
+        return sum(record.seconds for record in self.records if record is not None and record.depth == 0)
+
+    def _traced(self):
+        if self.trace_memory and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()
+        return 0, 0
+
+    def begin(self, name):
+        current, peak = self._traced()
+        if self._open:
+            # Die Spitze des umschließenden Schritts vor dem Zurücksetzen sichern
+            self._open[-1].peak = max(self._open[-1].peak, peak)
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._open.append(_OpenStage(name, time.perf_counter(), current))
+        # Platz in Startreihenfolge reservieren, damit verschachtelte Schritte unter ihrem Elternschritt stehen
+        self.records.append(None)
+        return len(self.records) - 1
+
+    def end(self, index):
+        seconds = time.perf_counter() - self._open[-1].start
+        current, peak = self._traced()
+        finished = self._open.pop()
+        finished.peak = max(finished.peak, peak)
+        if self._open:
+            self._open[-1].peak = max(self._open[-1].peak, finished.peak)
+        self.records[index] = StageRecord(finished.name, len(self._open), seconds,
+                                          max(finished.peak - finished.baseline, 0))
+
+    def table(self):
+        """Messwerte als Tabelle, verschachtelte Schritte mit ↳ markiert"""
+        records = [record for record in self.records if record is not None]
+        return pd.DataFrame({
+            'Schritt': ['↳ ' * record.depth + record.name for record in records],
+            'Zeit (ms)': [record.seconds * 1000 for record in records],
+            'Spitze (MB)': [record.peak_bytes / 1024 ** 2 for record in records]
+        })
+
+    def to_json(self):
+        return json.dumps({
+            'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'stages': [record._asdict() for record in self.records if record is not None]
+        })
+
+
+@contextmanager
+def stage(name):
+    """Misst den umschlossenen Block, falls im aktuellen Kontext ein Recorder aktiv ist"""
+    recorder = _active_recorder.get()
+    if recorder is None:
+        yield
+        return
+    index = recorder.begin(name)
+    try:
+        yield
+    finally:
+        recorder.end(index)
+
+
+def start_recording(enabled, trace_memory=True):
+    """Setzt zu Beginn eines Skriptlaufs den Recorder des Kontexts (None = Messung aus).
+
+    Wird bei jedem Lauf aufgerufen, damit ein abgebrochener Lauf keinen
+    Recorder im wiederverwendeten Thread zurücklässt; dessen Zählung für
+    tracemalloc wird dabei freigegeben.
+    """
+    finish_recording()
+    recorder = StageRecorder(trace_memory) if enabled else None
+    if recorder is not None:
+        recorder._start_tracing()
+    _active_recorder.set(recorder)
+    return recorder
+
+
+def is_recording():
+    """Ob im aktuellen Kontext bereits ein Recorder misst"""
+    return _active_recorder.get() is not None
+
+
+def finish_recording():
+    recorder = _active_recorder.get()
+    if recorder is not None:
+        recorder._stop_tracing()
+    _active_recorder.set(None)
+
+
+def stop_memory_tracing():
+    """Beendet tracemalloc, sofern kein Recorder mehr misst (das Verfolgen verlangsamt jede Allokation)"""
+    with _tracing_lock:
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+_stage_logger = None
+
+
+def log_stages(recorder):
+    """Hängt die Messwerte eines Laufs als JSON-Zeile an die rollierende Logdatei an"""
+    global _stage_logger
+    if _stage_logger is None:
+        stage_log_path.parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(stage_log_path, maxBytes=stage_log_max_bytes,
+                                                       backupCount=stage_log_backups, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        _stage_logger = logging.getLogger('dp_visualization.stages')
+        _stage_logger.setLevel(logging.INFO)
+        _stage_logger.propagate = False
+        _stage_logger.addHandler(handler)
+    _stage_logger.info(recorder.to_json())
@@ -0,0 +1,1015 @@
+import re
+import sys
+import threading
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from analytics import compute_consistency, moment_std, priority_index, rating_moments
+from instrumentation import stage
+from result_cache import estimated_bytes
+
+# Farbpalette für Kategorien
+category_colors = {
+    'Umsetzung': '#FF6B6B',
+    'User Interface': '#4ECDC4',
+    'Interaktion': '#45B7D1',
+    'Monitoring': '#96CEB4',
+    'Systembeschreibung/Systemarchitektur': '#FFEAA7',
+    'Fallbasiert': '#DDA0DD'
+}
+default_color = '#999999'
+
+# Anzeigenamen für Quellkennungen, Interviews werden über ihr Kürzel erkannt (I7 -> Interview 7)
+source_label_overrides = {
+    'workshop': 'Workshop'
+}
+
+# Dezimalstellen, ab denen gemittelte Koordinaten als deckungsgleich gelten
+coordinate_decimals = 6
+
+# Bewertungen liegen in Zwanzigstelpunkten (0-200) als uint8 vor, 255 markiert fehlende Werte.
+# Halbpunkte bleiben exakt, über Umfrageteilnehmer gemittelte Werte werden beim Import auf 0,05 gerundet.
+rating_scale = 20
+missing_rating = 255
+
+# Zulässiger Bereich der Bewertungen; Abstand zur nächsten Stufe (in Stufen), der noch als
+# Rundungsrauschen gilt (float32 in Parquet)
+rating_min = 0
+rating_max = 10
+rating_step_tolerance = 1e-3
+
+# Klassen der Verteilungsanalyse: ganzzahlige Intervalle auf der 0-10 Skala
+histogram_bins = np.arange(0, 11)
+
+# Rasterweite der Dichteansicht (Halbpunkte ergeben 20 x 20 Zellen auf der 0-10 Skala)
+density_grid_step = 0.5
+
+viz_columns = ['name', 'category', 'relevanz', 'dringlichkeit', 'source', 'sources_list']
+
+
+def invalid_ratings(values):
+    """Maske der vorhandenen Bewertungen außerhalb von 0-10 oder neben den Stufen von `rating_scale`"""
+    values = np.asarray(values, dtype=float)
+    scaled = values * rating_scale
+    with np.errstate(invalid='ignore'):
+        return ~np.isnan(values) & ((values < rating_min) | (values > rating_max)
+                                    | (np.abs(scaled - np.rint(scaled)) > rating_step_tolerance))
+
+
+def encode_ratings(values):
+    """Wandelt Bewertungen (float, NaN = fehlend) in uint8-Stufen mit Sentinel um.
+
+    Ungültige Werte (siehe `invalid_ratings`) führen zu einem ValueError statt
+    stillschweigend überzulaufen oder mit dem Sentinel zusammenzufallen.
+    """
+    values = np.asarray(values, dtype=float)
+    invalid = invalid_ratings(values)
+    if invalid.any():
+        raise ValueError(f"{int(invalid.sum())} Bewertungen außerhalb von {rating_min}-{rating_max} oder nicht in "
+                         f"Schritten von {1 / rating_scale:g}, z. B. {values[invalid][:5].tolist()}")
+    encoded = np.full(values.shape, missing_rating, dtype=np.uint8)
+    valid = ~np.isnan(values)
+    encoded[valid] = np.rint(values[valid] * rating_scale).astype(np.uint8)
+    return encoded
+
+
+def decode_ratings(encoded):
+    """Wandelt uint8-Stufen zurück in float32, fehlende Werte werden NaN"""
+    values = encoded.astype(np.float32) / rating_scale
+    values[encoded == missing_rating] = np.nan
+    return values
+
+
+def source_label(source):
+    """Anzeigename einer Quelle"""
+    if source in source_label_overrides:
+        return source_label_overrides[source]
+    match = re.fullmatch(r'I(\d+)', source)
+    if match:
+        return f"Interview {match.group(1)}"
+    return source
+
+
+def discover_sources(columns):
+    """Quellkennungen aus Spaltenpaaren `<quelle>_relevanz`/`<quelle>_dringlichkeit` in Spaltenreihenfolge"""
+    columns = list(columns)
+    available = set(columns)
+    return [column[:-len('_relevanz')] for column in columns
+            if column.endswith('_relevanz') and column.replace('_relevanz', '_dringlichkeit') in available]
+
+
+def compact_design_principles(df):
+    """Reduziert das geladene DataFrame auf Name und Kategorie als Categorical.
+
+    Die Bewertungen stecken danach nur noch in der RatingTable.
+    """
+    return pd.DataFrame({
+        'name': pd.Categorical(df['name'].astype(str)),
+        'category': pd.Categorical(df['category'].astype(str))
+    }, index=pd.RangeIndex(len(df)))
+
+
+def _read_only(*arrays):
+    """Sperrt Arrays gegen Schreibzugriffe, damit geteilte Daten nicht versehentlich verändert werden"""
+    for array in arrays:
+        array.flags.writeable = False
+
+
+def _take(series, positions):
+    """Wählt Positionen aus, Categoricals bleiben dabei Categoricals"""
+    return series.array.take(positions)
+
+
+def _object_column(values):
+    """Baut ein Object-Array aus Python-Objekten (z. B. Listen) ohne Broadcasting"""
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+
+# Obergrenze für den vorberechneten Teilmengen-Würfel (Zellen je Array)
+subset_cube_max_cells = 2 ** 22
+
+# Obergrenze für die vorberechneten kumulierten Frames der Entwicklungsansicht (Quellen x DPs)
+evolution_max_cells = 2 ** 24
+
+
+class SubsetCube(NamedTuple):
+    """Summen und Anzahlen für jede Quellen-Teilmenge, Index ist die Bitmaske der Teilmenge"""
+    sums: np.ndarray
+    counts: np.ndarray
+
+
+class EvolutionFrames(NamedTuple):
+    """Kumulierte Summen und Anzahlen entlang der Quellreihenfolge: Frame k enthält die Quellen 0 bis k"""
+    sums: np.ndarray
+    counts: np.ndarray
+
+
+class RatingTable(NamedTuple):
+    """Bewertungen im Koordinatenformat: ein Eintrag je DP und Quelle mit vollständigem Bewertungspaar.
+
+    Die Einträge sind nach (dp_id, source_id) sortiert. `dp_id` ist die
+    Zeilenposition im DP-DataFrame, `source_id` der Index in `sources`.
+    Relevanz und Dringlichkeit sind uint8-Stufen (siehe `encode_ratings`).
+    Eine neue Quelle fügt nur Einträge hinzu, keine DP-Zeile wird breiter.
+    """
+    sources: list
+    n_dp: int
+    dp_id: np.ndarray
+    source_id: np.ndarray
+    relevanz: np.ndarray
+    dringlichkeit: np.ndarray
+    source_counts: np.ndarray
+    cube: Optional[SubsetCube]
+    evolution: Optional[EvolutionFrames] = None
+
+
+def _cube_fits(n_sources, n_dp, max_cells=None):
+    if max_cells is None:
+        max_cells = subset_cube_max_cells
+    return n_sources < 63 and (2 ** n_sources) * n_dp <= max_cells
+
+
+def _source_slices(n_sources, n_columns, column, source_id, relevanz, dringlichkeit):
+    """Quellscheiben (Quelle x Merkmal x Spalte) aus den Einträgen, (DP, Quelle) ist eindeutig"""
+    sums = np.zeros((n_sources, 2, n_columns), dtype=np.float32)
+    counts = np.zeros((n_sources, n_columns), dtype=np.uint16)
+    sums[source_id, 0, column] = decode_ratings(relevanz)
+    sums[source_id, 1, column] = decode_ratings(dringlichkeit)
+    counts[source_id, column] = 1
+    return sums, counts
+
+
+def _fill_subset_cube(n_sources, n_columns, column, source_id, relevanz, dringlichkeit):
+    """Summen/Anzahlen aller 2^k Quellen-Teilmengen über die Spalten `column` der Einträge.
+
+    Jede Teilmenge entsteht aus der Teilmenge ohne ihr niedrigstes Bit plus einer
+    Quellscheibe, der Aufbau kostet also eine Addition pro Teilmenge.
+    """
+    sums, counts = _source_slices(n_sources, n_columns, column, source_id, relevanz, dringlichkeit)
+
+    cube_sums = np.zeros((2 ** n_sources, 2, n_columns), dtype=np.float32)
+    cube_counts = np.zeros((2 ** n_sources, n_columns), dtype=np.uint16)
+    for bitmask in range(1, 2 ** n_sources):
+        lowest = (bitmask & -bitmask).bit_length() - 1
+        rest = bitmask & (bitmask - 1)
+        cube_sums[bitmask] = cube_sums[rest] + sums[lowest]
+        cube_counts[bitmask] = cube_counts[rest] + counts[lowest]
+    return cube_sums, cube_counts
+
+
+def build_subset_cube(ratings, max_cells=None):
+    """Materialisiert Summen/Anzahlen aller 2^k Quellen-Teilmengen.
+
+    Übersteigt der Würfel `max_cells`, wird None geliefert und die Abfrage läuft
+    direkt über die Einträge.
+    """
+    n_sources, n_dp = len(ratings.sources), ratings.n_dp
+    if not _cube_fits(n_sources, n_dp, max_cells):
+        return None
+
+    cube_sums, cube_counts = _fill_subset_cube(n_sources, n_dp, ratings.dp_id, ratings.source_id,
+                                               ratings.relevanz, ratings.dringlichkeit)
+    _read_only(cube_sums, cube_counts)
+    return SubsetCube(cube_sums, cube_counts)
+
+
+def extend_subset_cube(ratings, dp_id, source_id, relevanz, dringlichkeit, max_cells=None):
+    """Würfel der um neue Einträge erweiterten Tabelle, ohne die alten Einträge erneut zu summieren.
+
+    `ratings` ist bereits die erweiterte Tabelle (neue Quellen und DPs hinten
+    angehängt), die übrigen Argumente sind nur die neuen Einträge. Eine Teilmenge
+    setzt sich aus dem alten Würfelwert ihrer bisherigen Quellen und dem Würfel
+    der neuen Einträge zusammen; letzterer umfasst nur die betroffenen DPs.
+    """
+    old = ratings.cube
+    n_sources, n_dp = len(ratings.sources), ratings.n_dp
+    if old is None or not _cube_fits(n_sources, n_dp, max_cells):
+        return build_subset_cube(ratings, max_cells)
+
+    old_masks, old_n_dp = len(old.counts), old.counts.shape[1]
+    bitmasks = np.arange(2 ** n_sources) & (old_masks - 1)
+    cube_sums = np.zeros((2 ** n_sources, 2, n_dp), dtype=np.float32)
+    cube_counts = np.zeros((2 ** n_sources, n_dp), dtype=np.uint16)
+    cube_sums[:, :, :old_n_dp] = old.sums[bitmasks]
+    cube_counts[:, :old_n_dp] = old.counts[bitmasks]
+
+    touched, column = np.unique(dp_id, return_inverse=True)
+    delta_sums, delta_counts = _fill_subset_cube(n_sources, len(touched), column, source_id,
+                                                 relevanz, dringlichkeit)
+    cube_sums[:, :, touched] += delta_sums
+    cube_counts[:, touched] += delta_counts
+
+    _read_only(cube_sums, cube_counts)
+    return SubsetCube(cube_sums, cube_counts)
+
+
+def _evolution_fits(n_sources, n_dp, max_cells=None):
+    if max_cells is None:
+        max_cells = evolution_max_cells
+    return n_sources * n_dp <= max_cells
+
+
+def build_evolution(ratings, max_cells=None):
+    """Kumulierte Frames über alle Quellen in einem Durchlauf (None, falls größer als `max_cells`)"""
+    n_sources, n_dp = len(ratings.sources), ratings.n_dp
+    if not _evolution_fits(n_sources, n_dp, max_cells):
+        return None
+
+    sums, counts = _source_slices(n_sources, n_dp, ratings.dp_id, ratings.source_id,
+                                  ratings.relevanz, ratings.dringlichkeit)
+    sums = np.cumsum(sums, axis=0, dtype=np.float32)
+    counts = np.cumsum(counts, axis=0, dtype=np.uint16)
+    _read_only(sums, counts)
+    return EvolutionFrames(sums, counts)
+
+
+def extend_evolution(ratings, source_id, max_cells=None):
+    """Frames der um neue Einträge erweiterten Tabelle.
+
+    `ratings` ist bereits die erweiterte Tabelle, `source_id` die Quellen der
+    neuen Einträge. Frames vor der ersten betroffenen Quelle bleiben erhalten,
+    ab dort wird von deren Vorgänger aus weiter kumuliert. Eine neue Quelle
+    hängt also nur einen Frame an.
+    """
+    old = ratings.evolution
+    n_sources, n_dp = len(ratings.sources), ratings.n_dp
+    if old is None or not _evolution_fits(n_sources, n_dp, max_cells):
+        return build_evolution(ratings, max_cells)
+
+    old_frames, old_n_dp = old.counts.shape
+    first = min(int(source_id.min()), old_frames) if len(source_id) else old_frames
+    sums = np.zeros((n_sources, 2, n_dp), dtype=np.float32)
+    counts = np.zeros((n_sources, n_dp), dtype=np.uint16)
+    sums[:first, :, :old_n_dp] = old.sums[:first]
+    counts[:first, :old_n_dp] = old.counts[:first]
+
+    entries = ratings.source_id >= first
+    slice_sums, slice_counts = _source_slices(n_sources - first, n_dp, ratings.dp_id[entries],
+                                              ratings.source_id[entries] - first, ratings.relevanz[entries],
+                                              ratings.dringlichkeit[entries])
+    if first:
+        slice_sums[0] += sums[first - 1]
+        slice_counts[0] += counts[first - 1]
+    np.cumsum(slice_sums, axis=0, dtype=np.float32, out=sums[first:])
+    np.cumsum(slice_counts, axis=0, dtype=np.uint16, out=counts[first:])
+    _read_only(sums, counts)
+    return EvolutionFrames(sums, counts)
+
+
+def _check_ratings(dp_id, source_id, relevanz, dringlichkeit, sources, dp_names=None):
+    """Bricht mit einem ValueError ab, der die ersten ungültigen Bewertungen mit DP und Quelle nennt"""
+    problems = []
+    for feature, values in (('Relevanz', relevanz), ('Dringlichkeit', dringlichkeit)):
+        for entry in np.flatnonzero(invalid_ratings(values)):
+            dp = int(dp_id[entry])
+            name = dp_names[dp] if dp_names is not None else f"DP {dp}"
+            problems.append(f"{name} / {sources[int(source_id[entry])]}: {feature} {float(values[entry]):g}")
+    if problems:
+        raise ValueError(f"{len(problems)} ungültige Bewertungen (erlaubt {rating_min}-{rating_max} in Schritten "
+                         f"von {1 / rating_scale:g}): {'; '.join(problems[:10])}")
+
+
+def _encode_complete(dp_id, source_id, relevanz, dringlichkeit, sources, dp_names=None):
+    """Prüft und kodiert Koordinatenlisten, unvollständige Bewertungspaare werden verworfen"""
+    relevanz = np.asarray(relevanz, dtype=float)
+    dringlichkeit = np.asarray(dringlichkeit, dtype=float)
+    _check_ratings(dp_id, source_id, relevanz, dringlichkeit, sources, dp_names)
+    relevanz = encode_ratings(relevanz)
+    dringlichkeit = encode_ratings(dringlichkeit)
+    complete = (relevanz != missing_rating) & (dringlichkeit != missing_rating)
+    return (np.asarray(dp_id)[complete].astype(np.int32), np.asarray(source_id)[complete].astype(np.int32),
+            relevanz[complete], dringlichkeit[complete])
+
+
+def build_rating_table(sources, n_dp, dp_id, source_id, relevanz, dringlichkeit, dp_names=None):
+    """Baut die RatingTable aus Koordinatenlisten (Bewertungen als float, NaN = fehlend).
+
+    Unvollständige Bewertungspaare werden verworfen, die Einträge sortiert und
+    gegen Schreibzugriffe gesperrt, da die Tabelle prozessweit geteilt wird.
+    Ungültige Bewertungen führen zu einem ValueError, der DP (Name aus
+    `dp_names`, sonst Position) und Quelle nennt.
+    """
+    dp_id, source_id, relevanz, dringlichkeit = _encode_complete(dp_id, source_id, relevanz, dringlichkeit,
+                                                                 sources, dp_names)
+    order = np.lexsort((source_id, dp_id))
+    dp_id, source_id = dp_id[order], source_id[order]
+    relevanz, dringlichkeit = relevanz[order], dringlichkeit[order]
+    source_counts = np.bincount(source_id, minlength=len(sources))
+
+    _read_only(dp_id, source_id, relevanz, dringlichkeit, source_counts)
+    ratings = RatingTable(list(sources), int(n_dp), dp_id, source_id, relevanz, dringlichkeit, source_counts, None)
+    return ratings._replace(cube=build_subset_cube(ratings), evolution=build_evolution(ratings))
+
+
+def append_ratings(ratings, sources, n_dp, dp_id, source_id, relevanz, dringlichkeit, dp_names=None):
+    """Neue RatingTable mit zusätzlichen Einträgen, die bestehende bleibt unverändert.
+
+    `sources` und `n_dp` dürfen nur hinten wachsen (neue Quellen, neue DPs).
+    Bereits vorhandene Paare aus DP und Quelle werden abgelehnt, die Ablage ist
+    nur fortschreibend. Die neuen Einträge werden in die sortierte Folge
+    eingemischt; Quellzähler, Teilmengen-Würfel und Entwicklungs-Frames werden
+    nur um die neuen Einträge ergänzt.
+    """
+    if list(sources[:len(ratings.sources)]) != list(ratings.sources) or n_dp < ratings.n_dp:
+        raise ValueError("Quellen und Design Principles können nur ergänzt werden")
+    dp_id, source_id, relevanz, dringlichkeit = _encode_complete(dp_id, source_id, relevanz, dringlichkeit,
+                                                                 sources, dp_names)
+
+    old_keys = ratings.dp_id.astype(np.int64) * len(sources) + ratings.source_id
+    new_keys = dp_id.astype(np.int64) * len(sources) + source_id
+    if len(np.unique(new_keys)) < len(new_keys) or np.isin(new_keys, old_keys).any():
+        raise ValueError("Bewertungen für bereits vorhandene Paare aus Design Principle und Quelle")
+
+    # Beide Folgen sind bzw. werden sortiert, der stabile Sort nutzt die vorhandenen Läufe
+    new_order = np.argsort(new_keys, kind='stable')
+    order = np.argsort(np.concatenate([old_keys, new_keys[new_order]]), kind='stable')
+    merged_dp_id = np.concatenate([ratings.dp_id, dp_id[new_order]])[order]
+    merged_source_id = np.concatenate([ratings.source_id, source_id[new_order]])[order]
+    merged_relevanz = np.concatenate([ratings.relevanz, relevanz[new_order]])[order]
+    merged_dringlichkeit = np.concatenate([ratings.dringlichkeit, dringlichkeit[new_order]])[order]
+    source_counts = np.bincount(source_id, minlength=len(sources))
+    source_counts[:len(ratings.source_counts)] += ratings.source_counts
+
+    _read_only(merged_dp_id, merged_source_id, merged_relevanz, merged_dringlichkeit, source_counts)
+    extended = RatingTable(list(sources), int(n_dp), merged_dp_id, merged_source_id, merged_relevanz,
+                           merged_dringlichkeit, source_counts, ratings.cube, ratings.evolution)
+    return extended._replace(cube=extend_subset_cube(extended, dp_id, source_id, relevanz, dringlichkeit),
+                             evolution=extend_evolution(extended, source_id))
+
+
+def ratings_from_wide(df, sources=None):
+    """Überführt das breite Format aus data.py (Spalten je Quelle) in eine RatingTable"""
+    if sources is None:
+        sources = discover_sources(df.columns)
+    relevanz = df[[f"{source}_relevanz" for source in sources]].to_numpy(dtype=float)
+    dringlichkeit = df[[f"{source}_dringlichkeit" for source in sources]].to_numpy(dtype=float)
+
+    # Auch Einzelwerte unvollständiger Paare prüfen, verworfen werden die Paare erst danach
+    dp_id, source_id = np.nonzero(~(np.isnan(relevanz) & np.isnan(dringlichkeit)))
+    return build_rating_table(sources, len(df), dp_id, source_id,
+                              relevanz[dp_id, source_id], dringlichkeit[dp_id, source_id],
+                              df['name'].astype(str).to_numpy())
+
+
+def ratings_moments(ratings):
+    """Anzahl, Mittelwert und Abweichungsquadratsumme je DP über alle Quellen (einmaliger Durchlauf)"""
+    values = np.column_stack([decode_ratings(ratings.relevanz), decode_ratings(ratings.dringlichkeit)])
+    return rating_moments(ratings.n_dp, ratings.dp_id, values)
+
+
+def moments_table(df, moments, selected_dp_names=None):
+    """Fortgeschriebene Gesamtstatistik je Design Principle als Tabelle"""
+    std = moment_std(moments)
+    table = pd.DataFrame({
+        'Design Principle': df['name'].to_numpy(),
+        'Kategorie': df['category'].to_numpy(),
+        'Anzahl Bewertungen': moments.count,
+        'Relevanz Mittel': np.where(moments.count > 0, moments.mean[:, 0], np.nan),
+        'Relevanz Std': std[:, 0],
+        'Dringlichkeit Mittel': np.where(moments.count > 0, moments.mean[:, 1], np.nan),
+        'Dringlichkeit Std': std[:, 1]
+    })
+    if selected_dp_names is not None:
+        table = table[table['Design Principle'].isin(selected_dp_names)]
+    return table[table['Anzahl Bewertungen'] > 0]
+
+
+def selected_source_ids(ratings, selected_sources):
+    """Indizes der ausgewählten Quellen, die überhaupt Bewertungen haben"""
+    source_index = {source: j for j, source in enumerate(ratings.sources)}
+    ids = np.array([source_index[source] for source in selected_sources if source in source_index], dtype=np.int32)
+    return ids[ratings.source_counts[ids] > 0]
+
+
+def subset_totals(ratings, source_ids):
+    """Summen (2 x DP) und Anzahlen (DP) für die Quellen-Teilmenge `source_ids`"""
+    if ratings.cube is not None:
+        bitmask = int(np.bitwise_or.reduce(np.left_shift(1, source_ids))) if len(source_ids) else 0
+        return ratings.cube.sums[bitmask], ratings.cube.counts[bitmask]
+
+    # Ohne Würfel: maskierte Summe direkt über die Einträge
+    selected = np.zeros(len(ratings.sources), dtype=bool)
+    selected[source_ids] = True
+    entries = selected[ratings.source_id]
+    dp_id = ratings.dp_id[entries]
+    sums = np.stack([
+        np.bincount(dp_id, weights=decode_ratings(ratings.relevanz[entries]), minlength=ratings.n_dp),
+        np.bincount(dp_id, weights=decode_ratings(ratings.dringlichkeit[entries]), minlength=ratings.n_dp)
+    ])
+    return sums, np.bincount(dp_id, minlength=ratings.n_dp)
+
+
+def source_weight_vector(ratings, source_weights=None):
+    """Gewicht je Quelle in der Reihenfolge von `ratings.sources`, nicht angegebene Quellen zählen 1"""
+    weights = np.ones(len(ratings.sources))
+    if source_weights:
+        source_index = {source: j for j, source in enumerate(ratings.sources)}
+        for source, weight in source_weights.items():
+            if source in source_index:
+                weights[source_index[source]] = weight
+    return weights
+
+
+def weighted_totals(ratings, source_ids, weights):
+    """Gewichtete Summen (2 x DP) und Gewichtssummen (DP) für die Quellen `source_ids`.
+
+    Entspricht dem Produkt der dünn besetzten Matrix DP x Quelle mit dem
+    Gewichtsvektor. Die Gewichtssumme zählt je DP nur vorhandene Bewertungen,
+    fehlende Quellen normieren die Gewichte also nicht nach unten.
+    """
+    selected = np.zeros(len(ratings.sources))
+    selected[source_ids] = weights[source_ids]
+    entry_weights = selected[ratings.source_id]
+    sums = np.stack([
+        np.bincount(ratings.dp_id, weights=entry_weights * decode_ratings(ratings.relevanz), minlength=ratings.n_dp),
+        np.bincount(ratings.dp_id, weights=entry_weights * decode_ratings(ratings.dringlichkeit),
+                    minlength=ratings.n_dp)
+    ])
+    return sums, np.bincount(ratings.dp_id, weights=entry_weights, minlength=ratings.n_dp)
+
+
+def evolution_frames(ratings, source_ids):
+    """Kumulierte Summen (Frame x 2 x DP) und Anzahlen (Frame x DP) über die Quellen `source_ids`.
+
+    Ein Frame je Quelle in Quellreihenfolge. Aus den vorberechneten Frames
+    aller Quellen wird der Beitrag abgewählter Quellen (Differenz benachbarter
+    Frames) wieder abgezogen; ohne vorberechnete Frames wird direkt über die
+    Einträge kumuliert.
+    """
+    source_ids = np.sort(source_ids)
+    frames = ratings.evolution
+    if frames is None:
+        source_rank = np.full(len(ratings.sources), -1, dtype=np.int32)
+        source_rank[source_ids] = np.arange(len(source_ids))
+        entries = source_rank[ratings.source_id] >= 0
+        sums, counts = _source_slices(len(source_ids), ratings.n_dp, ratings.dp_id[entries],
+                                      source_rank[ratings.source_id[entries]], ratings.relevanz[entries],
+                                      ratings.dringlichkeit[entries])
+        return np.cumsum(sums, axis=0, dtype=np.float32), np.cumsum(counts, axis=0, dtype=np.int32)
+
+    sums = frames.sums[source_ids]
+    counts = frames.counts[source_ids].astype(np.int32)
+    skipped = np.setdiff1d(np.arange(source_ids[-1] + 1 if len(source_ids) else 0), source_ids)
+    if len(skipped):
+        previous = skipped - 1
+        skipped_sums = frames.sums[skipped] - np.where((previous >= 0)[:, None, None], frames.sums[previous], 0)
+        skipped_counts = (frames.counts[skipped].astype(np.int32)
+                          - np.where((previous >= 0)[:, None], frames.counts[previous], 0))
+        # Je gewähltem Frame die Summe der bis dahin abgewählten Quellen abziehen
+        before = np.searchsorted(skipped, source_ids) - 1
+        has_skipped = before >= 0
+        sums[has_skipped] -= np.cumsum(skipped_sums, axis=0)[before[has_skipped]]
+        counts[has_skipped] -= np.cumsum(skipped_counts, axis=0)[before[has_skipped]]
+    return sums, counts
+
+
+def _source_patterns(dp_id, source_rank, n_sources, dp_rows):
+    """Bitmuster der vorhandenen Quellen je DP, zusammengefasst zu eindeutigen Mustern.
+
+    Liefert eine bool-Matrix (Muster x Quelle) und je Zeile in `dp_rows` den Index ihres Musters.
+    """
+    words = max((n_sources + 63) // 64, 1)
+    keys = np.zeros((int(dp_rows.max()) + 1 if len(dp_rows) else 0, words), dtype=np.uint64)
+    np.bitwise_or.at(keys, (dp_id, source_rank // 64), np.left_shift(np.uint64(1), (source_rank % 64).astype(np.uint64)))
+
+    patterns, pattern_index = np.unique(keys[dp_rows], axis=0, return_inverse=True)
+    ranks = np.arange(n_sources)
+    bits = (patterns[:, ranks // 64] >> (ranks % 64).astype(np.uint64)) & np.uint64(1)
+    return bits.astype(bool), pattern_index.reshape(-1)
+
+
+def _average_sources(dp_id, rank, labels, dp_rows, title):
+    """Beschriftung `<title> (<Quellen>)` und Quellenliste je Zeile in `dp_rows`.
+
+    Pro Muster vorhandener Quellen werden Liste und Beschriftung nur einmal gebaut.
+    """
+    patterns, pattern_index = _source_patterns(dp_id, rank, len(labels), dp_rows)
+    label_array = np.array(labels, dtype=object)
+    pattern_lists = [label_array[pattern].tolist() for pattern in patterns]
+    pattern_sources = [f"{title} ({', '.join(used)})" for used in pattern_lists]
+    return (pd.Categorical.from_codes(pattern_index, categories=pattern_sources),
+            _object_column(pattern_lists)[pattern_index])
+
+
+def prepare_visualization_data(df, selected_sources, show_mode, selected_categories, selected_dp_names,
+                               ratings=None, responses=None):
+    """Erstellt die Plotdaten spaltenweise aus den Koordinaten-Einträgen ohne Schleife über die Zeilen.
+
+    `responses` (Einzelantworten aus Umfragen, siehe `storage.read_responses`)
+    ersetzt bei einzelnen Datenpunkten die gemittelten Einträge dieser Quellen
+    durch einen Punkt je Teilnehmer.
+    """
+    if ratings is None:
+        ratings = ratings_from_wide(df)
+
+    # Nach Kategorien und Design Principles filtern
+    row_mask = (
+        (df['category'].isin(selected_categories)) &
+        (df['name'].isin(selected_dp_names))
+    ).to_numpy()
+
+    # Nur ausgewählte Quellen mit mindestens einer Bewertung berücksichtigen
+    source_ids = selected_source_ids(ratings, selected_sources)
+    if not row_mask.any() or source_ids.size == 0:
+        return pd.DataFrame(columns=viz_columns)
+
+    labels = [source_label(ratings.sources[j]) for j in source_ids]
+    source_rank = np.full(len(ratings.sources), -1, dtype=np.int32)
+    source_rank[source_ids] = np.arange(len(source_ids))
+
+    # Geteilte Einträge nur über Indizes ansprechen, keine Kopie der Bewertungen je Sitzung
+    entries = np.flatnonzero((source_rank[ratings.source_id] >= 0) & row_mask[ratings.dp_id])
+    dp_id = ratings.dp_id[entries]
+    rank = source_rank[ratings.source_id[entries]]
+
+    if show_mode == "Durchschnittswerte":
+        # Durchschnittswerte über die vorhandenen Quellen je DP
+        sums, counts = subset_totals(ratings, source_ids)
+        dp_rows = np.flatnonzero(row_mask & (counts > 0))
+        relevanz_avg = (sums[0, dp_rows] / counts[dp_rows]).astype(np.float32)
+        dringlichkeit_avg = (sums[1, dp_rows] / counts[dp_rows]).astype(np.float32)
+
+        source, sources_list = _average_sources(dp_id, rank, labels, dp_rows, "Durchschnitt")
+        return pd.DataFrame({
+            'name': _take(df['name'], dp_rows),
+            'category': _take(df['category'], dp_rows),
+            'relevanz': relevanz_avg,
+            'dringlichkeit': dringlichkeit_avg,
+            'source': source,
+            'sources_list': sources_list
+        }, columns=viz_columns)
+
+    # Einzelne Datenpunkte (auch Grundlage der Dichteansicht): Einträge sind bereits DP-weise in Quellreihenfolge sortiert
+    relevanz = decode_ratings(ratings.relevanz[entries])
+    dringlichkeit = decode_ratings(ratings.dringlichkeit[entries])
+    if responses is not None:
+        dp_id, relevanz, dringlichkeit, rank, labels = _expand_responses(
+            ratings, responses, row_mask, source_rank, entries, dp_id, relevanz, dringlichkeit, rank, labels
+        )
+
+    return pd.DataFrame({
+        'name': _take(df['name'], dp_id),
+        'category': _take(df['category'], dp_id),
+        'relevanz': relevanz,
+        'dringlichkeit': dringlichkeit,
+        'source': pd.Categorical.from_codes(rank, categories=labels),
+        'sources_list': _object_column([[label] for label in labels])[rank]
+    }, columns=viz_columns)
+
+
+def _expand_responses(ratings, responses, row_mask, source_rank, entries, dp_id, relevanz, dringlichkeit,
+                      rank, labels):
+    """Ersetzt die Einträge von Quellen mit Einzelantworten durch die gefilterten Antworten.
+
+    Jede Antwort erhält die Beschriftung `<Quelle> · <Teilnehmer>`, die Zeilen
+    bleiben DP-weise sortiert.
+    """
+    source_index = {source: j for j, source in enumerate(ratings.sources)}
+    response_source_id = np.array([source_index.get(source, -1) for source in responses['source'].astype(str)],
+                                  dtype=np.int32)
+    response_dp_id = responses['dp_id'].to_numpy()
+    keep_response = (response_source_id >= 0) & row_mask[response_dp_id]
+    keep_response[keep_response] = source_rank[response_source_id[keep_response]] >= 0
+    if not keep_response.any():
+        # Keine Antwort im Filter (z. B. Umfrage abgewählt): gemittelte Einträge bleiben
+        return dp_id, relevanz, dringlichkeit, rank, labels
+    replaced = np.isin(ratings.source_id[entries], np.unique(response_source_id[keep_response]))
+
+    # Beschriftungen nur je eindeutigem Paar aus Quelle und Teilnehmer bauen
+    label_codes, pairs = pd.MultiIndex.from_arrays([
+        responses['source'].astype(str).to_numpy()[keep_response],
+        responses['respondent'].astype(str).to_numpy()[keep_response]
+    ]).factorize()
+    response_label_names = [f"{source_label(source)} · {respondent}" for source, respondent in pairs]
+
+    dp_id = np.concatenate([dp_id[~replaced], response_dp_id[keep_response]])
+    order = np.argsort(dp_id, kind='stable')
+    relevanz = np.concatenate([relevanz[~replaced], responses['relevanz'].to_numpy(np.float32)[keep_response]])
+    dringlichkeit = np.concatenate([dringlichkeit[~replaced],
+                                    responses['dringlichkeit'].to_numpy(np.float32)[keep_response]])
+    rank = np.concatenate([rank[~replaced], len(labels) + label_codes])
+    return dp_id[order], relevanz[order], dringlichkeit[order], rank[order], labels + response_label_names
+
+
+def _sequence_patterns(codes, starts, sizes):
+    """Fasst Gruppen mit gleicher Code-Folge zu Mustern zusammen.
+
+    Gruppe g umfasst `codes[starts[g]:starts[g] + sizes[g]]`. Je Position
+    innerhalb der Gruppen wird (bisheriges Muster, Code) per Hash faktorisiert,
+    die Zahl der Durchläufe ist also die größte Gruppe, nicht die Zahl der
+    Gruppen. Liefert je Gruppe den Musterindex und je Muster eine Beispielgruppe.
+    """
+    pattern = np.full(len(starts), -1, dtype=np.int64)
+    n_codes = int(codes.max()) + 2 if len(codes) else 1
+    for position in range(int(sizes.max()) if len(sizes) else 0):
+        active = np.flatnonzero(sizes > position)
+        pattern[active] = pd.factorize((pattern[active] + 1) * n_codes + codes[starts[active] + position])[0]
+    # Musternummern gelten je Durchlauf, die Gruppengröße unterscheidet die Durchläufe
+    pattern_index = pd.factorize(sizes.astype(np.int64) * (len(starts) + 1) + pattern + 1)[0]
+    # Erste Gruppe je Muster: rückwärts zuweisen, die früheste Gruppe schreibt zuletzt
+    examples = np.empty(int(pattern_index.max()) + 1 if len(pattern_index) else 0, dtype=np.int64)
+    examples[pattern_index[::-1]] = np.arange(len(pattern_index) - 1, -1, -1)
+    return pattern_index, examples
+
+
+def _pattern_column(codes, starts, sizes, build):
+    """Object-Spalte je Gruppe, `build(start, end)` läuft nur einmal je Muster für eine Beispielgruppe"""
+    pattern_index, examples = _sequence_patterns(codes, starts, sizes)
+    bounds = zip(starts[examples].tolist(), (starts[examples] + sizes[examples]).tolist())
+    return _object_column([build(start, end) for start, end in bounds])[pattern_index]
+
+
+# NEUE FUNKTION: Daten für verbessertes Hovering gruppieren
+def prepare_grouped_visualization_data(viz_df):
+    """Gruppiert Daten mit gleichen Koordinaten für verbessertes Hovering.
+
+    Gruppen entstehen in einem groupby-Durchlauf (ngroup), alles Weitere läuft
+    über sortierte Gruppengrenzen und ganzzahlig kodierte Quellen. Quellentext
+    und Quellenliste werden nur je Muster gleicher Quellenfolge gebaut und von
+    allen Gruppen dieses Musters geteilt; Python-Arbeit fällt je Muster an,
+    nicht je Gruppe. Koordinaten werden auf `coordinate_decimals` Stellen
+    gerundet, damit gemittelte Werte mit Rundungsrauschen trotzdem als
+    deckungsgleich erkannt werden.
+    """
+    if viz_df.empty:
+        return viz_df
+
+    group_keys = ['name', 'category', 'relevanz', 'dringlichkeit']
+    keyed = pd.DataFrame({
+        'name': viz_df['name'].array,
+        'category': viz_df['category'].array,
+        'relevanz': viz_df['relevanz'].round(coordinate_decimals).to_numpy(),
+        'dringlichkeit': viz_df['dringlichkeit'].round(coordinate_decimals).to_numpy()
+    })
+    group_ids = keyed.groupby(group_keys, sort=True, observed=True).ngroup().to_numpy()
+
+    # Zeilen stabil nach Gruppe sortieren (Zeilen ohne gültigen Schlüssel fallen weg)
+    rows = np.flatnonzero(group_ids >= 0)
+    rows = rows[np.argsort(group_ids[rows], kind='stable')]
+    sorted_ids = group_ids[rows]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    sizes = np.diff(np.r_[starts, len(rows)])
+
+    # Quellentext: Einzelpunkte direkt übernehmen, Mehrfachgruppen je Muster einmal verketten
+    source_codes, source_names = pd.factorize(viz_df['source'])
+    source_names = np.asarray(source_names, dtype=object)
+    sorted_codes = source_codes[rows]
+    sources = source_names[sorted_codes[starts]]
+    multiple = np.flatnonzero(sizes > 1)
+    if len(multiple):
+        sorted_sources = source_names[sorted_codes].tolist()
+        sources[multiple] = _pattern_column(sorted_codes, starts[multiple], sizes[multiple],
+                                            lambda start, end: ', '.join(sorted_sources[start:end]))
+
+    # Quellenlisten vereinigen: (Gruppe, Quelle) kodieren, Duplikate per np.unique entfernen
+    exploded = pd.Series(viz_df['sources_list'].to_numpy()[rows], index=sorted_ids).explode().dropna()
+    codes, labels = pd.factorize(exploded.to_numpy(), sort=True)
+    pairs = np.unique(exploded.index.to_numpy() * len(labels) + codes)
+    pair_groups, pair_codes = np.divmod(pairs, max(len(labels), 1))
+    sources_count = np.bincount(pair_groups, minlength=len(starts))
+    flat_labels = np.asarray(labels, dtype=object)[pair_codes].tolist()
+    sources_list = _pattern_column(pair_codes, np.r_[0, np.cumsum(sources_count)[:-1]], sources_count,
+                                   lambda start, end: flat_labels[start:end])
+
+    first_rows = rows[starts]
+    return pd.DataFrame({
+        'name': _take(keyed['name'], first_rows),
+        'category': _take(keyed['category'], first_rows),
+        'relevanz': keyed['relevanz'].to_numpy()[first_rows],
+        'dringlichkeit': keyed['dringlichkeit'].to_numpy()[first_rows],
+        'sources': sources,
+        'sources_list': sources_list,
+        'sources_count': sources_count.astype(np.uint16)
+    })
+
+
+def compute_category_stats(viz_df):
+    """Mittelwerte, Streuung und Anzahl je Kategorie"""
+    category_stats = viz_df.groupby('category', observed=True).agg({
+        'relevanz': ['mean', 'std', 'count'],
+        'dringlichkeit': ['mean', 'std']
+    }).round(2)
+
+    category_stats.columns = ['Relevanz_Mittel', 'Relevanz_Std', 'Anzahl', 'Dringlichkeit_Mittel', 'Dringlichkeit_Std']
+    return category_stats
+
+
+def binned_counts(viz_df, column, bins=None):
+    """Zählt die Werte einer Spalte je Kategorie und Klasse in einem bincount-Durchlauf.
+
+    Liefert ein DataFrame (Kategorie x linke Klassengrenze), die letzte Klasse
+    schließt die obere Grenze ein. Kategorien ohne Werte fallen weg.
+    """
+    if bins is None:
+        bins = histogram_bins
+    n_bins = len(bins) - 1
+    categories = viz_df['category'].astype('category')
+    codes = categories.cat.codes.to_numpy()
+    values = viz_df[column].to_numpy(dtype=float)
+
+    valid = (codes >= 0) & ~np.isnan(values)
+    bin_index = np.clip(np.searchsorted(bins, values[valid], side='right') - 1, 0, n_bins - 1)
+    n_categories = len(categories.cat.categories)
+    counts = np.bincount(codes[valid] * n_bins + bin_index, minlength=n_categories * n_bins)
+
+    frame = pd.DataFrame(counts.reshape(n_categories, n_bins), index=categories.cat.categories, columns=bins[:-1])
+    return frame[frame.sum(axis=1) > 0]
+
+
+class DensityGrid(NamedTuple):
+    """Anzahl Punkte je Rasterzelle (Relevanz-Zeile x Dringlichkeit-Spalte), gesamt und je Kategorie"""
+    edges: np.ndarray
+    counts: np.ndarray
+    category_counts: np.ndarray
+    categories: list
+
+
+def density_grid(viz_df, step=None):
+    """Aggregiert alle Punkte in ein festes Raster über Dringlichkeit x Relevanz.
+
+    Ein bincount-Durchlauf über (Kategorie, Relevanz-Zelle, Dringlichkeit-Zelle);
+    das Ergebnis hat unabhängig von der Punktzahl immer dieselbe Größe.
+    """
+    if step is None:
+        step = density_grid_step
+    edges = np.arange(0, 10 + step / 2, step)
+    n_cells = len(edges) - 1
+    categories = viz_df['category'].astype('category')
+    codes = categories.cat.codes.to_numpy()
+    relevanz = viz_df['relevanz'].to_numpy(dtype=float)
+    dringlichkeit = viz_df['dringlichkeit'].to_numpy(dtype=float)
+
+    valid = (codes >= 0) & ~np.isnan(relevanz) & ~np.isnan(dringlichkeit)
+    row = np.clip(np.searchsorted(edges, relevanz[valid], side='right') - 1, 0, n_cells - 1)
+    column = np.clip(np.searchsorted(edges, dringlichkeit[valid], side='right') - 1, 0, n_cells - 1)
+    n_categories = len(categories.cat.categories)
+    category_counts = np.bincount(
+        (codes[valid] * n_cells + row) * n_cells + column, minlength=n_categories * n_cells * n_cells
+    ).reshape(n_categories, n_cells, n_cells)
+
+    # Nur Kategorien mit Punkten behalten
+    used = category_counts.sum(axis=(1, 2)) > 0
+    return DensityGrid(edges, category_counts.sum(axis=0), category_counts[used],
+                       categories.cat.categories[used].tolist())
+
+
+class EvolutionView(NamedTuple):
+    """Positionen der gefilterten DPs je Frame (NaN, solange ein DP noch keine Bewertung hat)"""
+    labels: list
+    names: np.ndarray
+    categories: np.ndarray
+    relevanz: np.ndarray
+    dringlichkeit: np.ndarray
+    counts: np.ndarray
+
+
+def evolution_view(df, ratings, selected_sources, selected_categories, selected_dp_names):
+    """Kumulierte Durchschnittswerte nach jeder Quelle, der letzte Frame entspricht "Durchschnittswerte" """
+    row_mask = (df['category'].isin(selected_categories) & df['name'].isin(selected_dp_names)).to_numpy()
+    source_ids = np.sort(selected_source_ids(ratings, selected_sources))
+    sums, counts = evolution_frames(ratings, source_ids)
+    dp_rows = np.flatnonzero(row_mask & (counts[-1] > 0)) if len(source_ids) else np.array([], dtype=np.int64)
+
+    counts = counts[:, dp_rows]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        relevanz = np.where(counts > 0, sums[:, 0, dp_rows] / counts, np.nan).astype(np.float32)
+        dringlichkeit = np.where(counts > 0, sums[:, 1, dp_rows] / counts, np.nan).astype(np.float32)
+    return EvolutionView(
+        labels=[source_label(ratings.sources[j]) for j in source_ids],
+        names=df['name'].to_numpy()[dp_rows],
+        categories=df['category'].to_numpy()[dp_rows],
+        relevanz=relevanz,
+        dringlichkeit=dringlichkeit,
+        counts=counts
+    )
+
+
+class ViewResults:
+    """Aus einem Filterzustand abgeleitete Tabellen (nur lesend verwenden).
+
+    Nur die Plotdaten entstehen sofort. Gruppierung, Statistiken, Konsistenz,
+    Prioritäts-Index, Klassen und Dichteraster werden erst beim ersten Zugriff
+    berechnet und dann gemerkt. Die Instanz liegt im geteilten Ergebnis-Cache, jede Tabelle wird
+    also höchstens einmal je Filterzustand berechnet, und nur, wenn eine
+    Ansicht sie tatsächlich zeigt.
+    """
+
+    def __init__(self, viz_df, show_mode, selected_dp_names, evolution=None):
+        self.viz_df = viz_df
+        self.show_mode = show_mode
+        self.selected_dp_names = selected_dp_names
+        self.evolution = evolution
+        self._results = {}
+        # Eine Sperre je Tabelle: eine lange Berechnung hält nur Anfragen nach derselben Tabelle auf
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def estimated_bytes(self):
+        """Geschätzter Speicherbedarf der Plotdaten, Frames und bisher berechneten Tabellen"""
+        return estimated_bytes([self.viz_df, self.evolution, list(self._results.values())])
+
+    def _memoized(self, name, compute):
+        with self._locks_lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._results:
+                with stage(name):
+                    self._results[name] = compute()
+            return self._results[name]
+
+    @property
+    def grouped_viz_df(self):
+        if self.viz_df.empty:
+            return self.viz_df
+        return self._memoized('prepare_grouped_visualization_data',
+                              lambda: prepare_grouped_visualization_data(self.viz_df))
+
+    @property
+    def category_stats(self):
+        if self.viz_df.empty:
+            return pd.DataFrame()
+        return self._memoized('compute_category_stats', lambda: compute_category_stats(self.viz_df))
+
+    @property
+    def consistency_df(self):
+        if self.viz_df.empty:
+            return pd.DataFrame()
+        return self._memoized('compute_consistency',
+                              lambda: compute_consistency(self.viz_df, self.selected_dp_names))
+
+    @property
+    def priorities(self):
+        if self.viz_df.empty:
+            return None
+        return self._memoized('priority_index', lambda: priority_index(self.viz_df))
+
+    @property
+    def relevanz_bins(self):
+        if self.viz_df.empty:
+            return pd.DataFrame()
+        return self._memoized('binned_counts_relevanz', lambda: binned_counts(self.viz_df, 'relevanz'))
+
+    @property
+    def dringlichkeit_bins(self):
+        if self.viz_df.empty:
+            return pd.DataFrame()
+        return self._memoized('binned_counts_dringlichkeit', lambda: binned_counts(self.viz_df, 'dringlichkeit'))
+
+    @property
+    def density(self):
+        if self.viz_df.empty or self.show_mode != "Dichteansicht":
+            return None
+        return self._memoized('density_grid', lambda: density_grid(self.viz_df))
+
+
+def compute_view(df, ratings, selected_sources, show_mode, selected_categories, selected_dp_names,
+                 responses=None):
+    """Berechnet die Plotdaten eines Filterzustands, alle weiteren Tabellen folgen bei Bedarf.
+
+    In der Entwicklungsansicht sind die Plotdaten die Durchschnittswerte, dazu
+    kommen die Frames der Animation.
+    """
+    evolution = None
+    if show_mode == "Entwicklung":
+        with stage('evolution_view'):
+            evolution = evolution_view(df, ratings, selected_sources, selected_categories, selected_dp_names)
+    with stage('prepare_visualization_data'):
+        viz_df = prepare_visualization_data(
+            df, selected_sources, "Durchschnittswerte" if show_mode == "Entwicklung" else show_mode,
+            selected_categories, selected_dp_names, ratings, responses
+        )
+    return ViewResults(viz_df, show_mode, list(selected_dp_names), evolution)
+
+
+def weighted_view(df, ratings, view, selected_sources, source_weights):
+    """Gewichtete Durchschnittswerte aus einer ungewichteten Ansicht "Durchschnittswerte".
+
+    Relevanz und Dringlichkeit werden über `weighted_totals` neu berechnet,
+    Beschriftung und Quellenliste nennen nur noch die Quellen mit Gewicht > 0
+    ("Gewichteter Durchschnitt (...)"). DPs, deren vorhandene Quellen alle das
+    Gewicht 0 haben, entfallen; sind alle Gewichte 0, ist die Ansicht leer.
+    """
+    viz_df = view.viz_df
+    if viz_df.empty:
+        return view
+
+    # DP-Namen sind eindeutig: Kategoriecode des Namens -> Zeile im DP-DataFrame
+    dp_of_code = np.empty(len(df['name'].cat.categories), dtype=np.int64)
+    dp_of_code[df['name'].cat.codes.to_numpy()] = np.arange(len(df))
+    dp_rows = dp_of_code[viz_df['name'].cat.codes.to_numpy()]
+
+    source_ids = selected_source_ids(ratings, selected_sources)
+    weights = source_weight_vector(ratings, source_weights)
+    with stage('weighted_totals'):
+        sums, totals = weighted_totals(ratings, source_ids, weights)
+    sums, totals = sums[:, dp_rows], totals[dp_rows]
+    weighted = totals > 0
+    divisor = np.where(weighted, totals, 1)
+    viz_df = viz_df.assign(relevanz=(sums[0] / divisor).astype(np.float32),
+                           dringlichkeit=(sums[1] / divisor).astype(np.float32))
+    if not weighted.all():
+        viz_df = viz_df[weighted].reset_index(drop=True)
+        dp_rows = dp_rows[weighted]
+    if viz_df.empty:
+        return ViewResults(viz_df, view.show_mode, view.selected_dp_names, view.evolution)
+
+    # Quellen mit Gewicht 0 tragen nichts bei und erscheinen weder in Beschriftung noch Markergröße
+    contributing = source_ids[weights[source_ids] > 0]
+    source_rank = np.full(len(ratings.sources), -1, dtype=np.int32)
+    source_rank[contributing] = np.arange(len(contributing))
+    row_mask = np.zeros(ratings.n_dp, dtype=bool)
+    row_mask[dp_rows] = True
+    entries = np.flatnonzero((source_rank[ratings.source_id] >= 0) & row_mask[ratings.dp_id])
+    source, sources_list = _average_sources(
+        ratings.dp_id[entries], source_rank[ratings.source_id[entries]],
+        [source_label(ratings.sources[j]) for j in contributing], dp_rows, "Gewichteter Durchschnitt"
+    )
+    viz_df = viz_df.assign(source=source, sources_list=sources_list)
+    return ViewResults(viz_df, view.show_mode, view.selected_dp_names, view.evolution)
+
+
+def _legacy_column_bytes(series):
+    """Speicherbedarf einer Spalte in der früheren Darstellung (float64 bzw. Python-Strings)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        string_sizes = np.array([sys.getsizeof(str(value)) for value in series.cat.categories], dtype=np.int64)
+        return len(series) * 8 + int(string_sizes[codes[codes >= 0]].sum())
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return len(series) * 8
+    return int(series.memory_usage(deep=True, index=False))
+
+
+def _frame_bytes(frame):
+    return int(frame.memory_usage(deep=True).sum())
+
+
+def memory_report(df, ratings, viz_df, grouped_viz_df):
+    """Speicherbedarf der Sitzungsdaten vorher (float64/object, Farbspalte je Zeile) und nachher"""
+    ratings_bytes = sum(array.nbytes for array in (
+        ratings.dp_id, ratings.source_id, ratings.relevanz, ratings.dringlichkeit, ratings.source_counts))
+    cube_bytes = ratings.cube.sums.nbytes + ratings.cube.counts.nbytes if ratings.cube is not None else 0
+    evolution = ratings.evolution
+    evolution_bytes = evolution.sums.nbytes + evolution.counts.nbytes if evolution is not None else 0
+
+    n_dp, n_sources = ratings.n_dp, len(ratings.sources)
+    color_bytes = sys.getsizeof(default_color) + 8
+    rows = [{
+        'Daten': 'Basisdaten (DP x Quelle)',
+        'Vorher (kB)': (n_dp * n_sources * 2 * 8 + sum(_legacy_column_bytes(df[column]) for column in df.columns)) / 1024,
+        'Nachher (kB)': (_frame_bytes(df) + ratings_bytes) / 1024
+    }]
+    for label, frame in (('Plotdaten', viz_df), ('Gruppierte Plotdaten', grouped_viz_df)):
+        legacy = sum(_legacy_column_bytes(frame[column]) for column in frame.columns) + len(frame) * color_bytes
+        rows.append({'Daten': label, 'Vorher (kB)': legacy / 1024, 'Nachher (kB)': _frame_bytes(frame) / 1024})
+    rows.append({'Daten': 'Teilmengen-Würfel (vorberechnet)', 'Vorher (kB)': 0.0, 'Nachher (kB)': cube_bytes / 1024})
+    rows.append({'Daten': 'Entwicklungs-Frames (vorberechnet)', 'Vorher (kB)': 0.0,
+                 'Nachher (kB)': evolution_bytes / 1024})
+
+    report = pd.DataFrame(rows).set_index('Daten')
+    report.loc['Summe'] = report.sum()
+    return report.round(1)
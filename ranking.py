@@ -0,0 +1,186 @@
+"""Konsens-Rangfolge der Design Principles aus den Rangfolgen der einzelnen Quellen.
+
+Jede Quelle ordnet die von ihr bewerteten DPs nach einem Kriterium (Priorität
+= Relevanz x Dringlichkeit, Relevanz oder Dringlichkeit). Die Ränge liegen als
+Matrix Quelle x DP vor (NaN = nicht bewertet) und werden auf drei Arten
+zusammengeführt: Borda-Zählung, Median-Rang und eine Kemeny-Näherung, die die
+Zahl der Paarvergleiche minimiert, in denen Quellen der Konsens-Reihenfolge
+widersprechen. Für alle drei zählen von einer Quelle nicht bewertete DPs als
+gemeinsam letzte dieser Quelle, damit ein DP mit nur einer Bewertung nicht
+allein durch fehlende Gegenstimmen an die Spitze kommt.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from processing import decode_ratings, selected_source_ids
+
+rank_criteria = ['Priorität', 'Relevanz', 'Dringlichkeit']
+
+# Obergrenze der Durchläufe mit Nachbarvertauschungen nach dem Pivot-Verfahren
+kemeny_max_passes = 100
+
+
+class RankMatrix(NamedTuple):
+    """Ränge je Quelle (Zeile) und DP (Spalte), 1 = höchster Wert, gleiche Werte mit mittlerem Rang.
+
+    `dp_rows` sind die Zeilen im DP-DataFrame, `rated` die Anzahl der von
+    jeder Quelle bewerteten DPs.
+    """
+    dp_rows: np.ndarray
+    source_ids: np.ndarray
+    ranks: np.ndarray
+    rated: np.ndarray
+
+
+def rank_matrix(df, ratings, selected_sources, selected_categories, selected_dp_names, criterion=None):
+    """Baut die Rangmatrix der gefilterten DPs für die ausgewählten Quellen"""
+    if criterion is None:
+        criterion = rank_criteria[0]
+    row_mask = (df['category'].isin(selected_categories) & df['name'].isin(selected_dp_names)).to_numpy()
+    source_ids = selected_source_ids(ratings, selected_sources)
+    source_rank = np.full(len(ratings.sources), -1, dtype=np.int64)
+    source_rank[source_ids] = np.arange(len(source_ids))
+
+    entries = (source_rank[ratings.source_id] >= 0) & row_mask[ratings.dp_id]
+    dp_rows = np.unique(ratings.dp_id[entries])
+    relevanz = decode_ratings(ratings.relevanz[entries])
+    dringlichkeit = decode_ratings(ratings.dringlichkeit[entries])
+    values = {'Priorität': relevanz * dringlichkeit, 'Relevanz': relevanz, 'Dringlichkeit': dringlichkeit}[criterion]
+
+    scores = np.full((len(source_ids), len(dp_rows)), np.nan, dtype=np.float32)
+    scores[source_rank[ratings.source_id[entries]], np.searchsorted(dp_rows, ratings.dp_id[entries])] = values
+    # pandas rangiert zeilenweise in kompiliertem Code und lässt fehlende Werte aus
+    ranks = pd.DataFrame(scores).rank(axis=1, ascending=False, method='average').to_numpy(np.float32)
+    return RankMatrix(dp_rows, source_ids, ranks, np.isfinite(ranks).sum(axis=1))
+
+
+def completed_ranks(matrix):
+    """Rangmatrix, in der nicht bewertete DPs gemeinsam die letzten Plätze ihrer Quelle teilen.
+
+    Die unbewerteten DPs einer Quelle erhalten den mittleren Rang der Plätze
+    `rated + 1` bis Anzahl DPs. Quellen ohne bewerteten DP bleiben NaN.
+    """
+    n = matrix.ranks.shape[1]
+    tied_last = ((matrix.rated + 1 + n) / 2).astype(np.float32)
+    ranks = np.where(np.isnan(matrix.ranks), tied_last[:, None], matrix.ranks)
+    ranks[matrix.rated == 0] = np.nan
+    return matrix._replace(ranks=ranks)
+
+
+def _relative_ranks(matrix):
+    """Vervollständigte Ränge auf [0, 1] skaliert (0 = Spitze, 1 = Ende)"""
+    n = matrix.ranks.shape[1]
+    return (completed_ranks(matrix).ranks - 1) / max(n - 1, 1)
+
+
+def borda_scores(matrix):
+    """Mittlere Borda-Punkte je DP über alle Quellen: 1 für den ersten Platz, 0 für den letzten.
+
+    Nicht bewertete DPs zählen als gemeinsam letzte der Quelle, wenige
+    Bewertungen senken die Punkte also.
+    """
+    points = 1 - _relative_ranks(matrix)
+    counted = np.isfinite(points).sum(axis=0)
+    return np.where(counted > 0, np.nansum(points, axis=0) / np.maximum(counted, 1), np.nan)
+
+
+def median_ranks(matrix):
+    """Median der relativen Ränge je DP (0 = Spitze, 1 = Ende), nicht bewertete als gemeinsam letzte"""
+    relative = _relative_ranks(matrix)
+    median = np.full(relative.shape[1], np.nan)
+    counted = np.isfinite(relative).any(axis=0)
+    median[counted] = np.nanmedian(relative[:, counted], axis=0)
+    return median
+
+
+def _preferences(ranks, first, second):
+    """Anzahl der Quellen, die `first` bzw. `second` vorziehen (je Spaltenpaar, nur gemeinsam bewertete)"""
+    a, b = ranks[:, first], ranks[:, second]
+    return (a < b).sum(axis=0), (b < a).sum(axis=0)
+
+
+def kemeny_order(matrix, initial_order):
+    """Näherung der Kemeny-Reihenfolge, ausgehend von `initial_order` (Spaltenpositionen).
+
+    Verglichen werden die Ränge in `matrix`, in `rank_aggregation` die
+    vervollständigten (`completed_ranks`).
+
+    Pivot-Verfahren (KwikSort) ebenenweise: alle Abschnitte einer Ebene werden
+    zugleich um das mittlere Element ihrer Startreihenfolge geteilt, ein DP
+    kommt vor den Pivot, wenn mehr Quellen ihn vorziehen; bei Gleichstand
+    bleibt seine Seite aus der Startreihenfolge. Danach werden benachbarte DPs
+    vertauscht, solange eine Mehrheit der Quellen das verlangt, jede
+    Vertauschung senkt die Zahl der Widersprüche.
+    """
+    ranks = matrix.ranks
+    order = np.array(initial_order)
+    n = len(order)
+    segment = np.zeros(n, dtype=np.int64)
+    positions = np.arange(n)
+    while n:
+        starts = np.flatnonzero(np.r_[True, segment[1:] != segment[:-1]])
+        sizes = np.diff(np.r_[starts, n])
+        if sizes.max() <= 1:
+            break
+        segment_index = np.repeat(np.arange(len(starts)), sizes)
+        pivot_position = (starts + sizes // 2)[segment_index]
+        wins, losses = _preferences(ranks, order, order[pivot_position])
+        side = np.where(wins > losses, -1, np.where(losses > wins, 1, np.sign(positions - pivot_position)))
+        side[positions == pivot_position] = 0
+        key = 3 * segment_index + side + 1
+        permutation = np.argsort(key, kind='stable')
+        order, segment = order[permutation], key[permutation]
+
+    for _ in range(kemeny_max_passes):
+        swapped = False
+        for offset in (0, 1):
+            k = np.arange(offset, n - 1, 2)
+            prefer_first, prefer_second = _preferences(ranks, order[k], order[k + 1])
+            swap = k[prefer_second > prefer_first]
+            if len(swap):
+                order[swap], order[swap + 1] = order[swap + 1], order[swap]
+                swapped = True
+        if not swapped:
+            break
+    return order
+
+
+def _places(order):
+    places = np.empty(len(order), dtype=np.int64)
+    places[order] = np.arange(1, len(order) + 1)
+    return places
+
+
+def rank_aggregation(df, ratings, selected_sources, selected_categories, selected_dp_names, criterion=None):
+    """Konsens-Rangfolge der gefilterten DPs nach Borda, Median-Rang und Kemeny-Näherung.
+
+    Sortiert nach dem Kemeny-Platz. Der Median-Rang ist auf die Zahl der DPs
+    skaliert (1 = Spitze). Von einer Quelle nicht bewertete DPs zählen in allen
+    drei Verfahren als gemeinsam letzte dieser Quelle. Leer bei weniger als
+    zwei Quellen oder DPs.
+    """
+    matrix = rank_matrix(df, ratings, selected_sources, selected_categories, selected_dp_names, criterion)
+    if len(matrix.source_ids) < 2 or len(matrix.dp_rows) < 2:
+        return pd.DataFrame()
+
+    borda = borda_scores(matrix)
+    median = median_ranks(matrix)
+    # Gleichstand bei Borda entscheidet der Median-Rang und umgekehrt
+    borda_order = np.lexsort((np.nan_to_num(median, nan=np.inf), -np.nan_to_num(borda, nan=-np.inf)))
+    median_order = np.lexsort((-np.nan_to_num(borda, nan=-np.inf), np.nan_to_num(median, nan=np.inf)))
+    kemeny = kemeny_order(completed_ranks(matrix), borda_order)
+
+    n = len(matrix.dp_rows)
+    table = pd.DataFrame({
+        'Design Principle': df['name'].to_numpy()[matrix.dp_rows],
+        'Kategorie': df['category'].to_numpy()[matrix.dp_rows],
+        'Quellen': np.isfinite(matrix.ranks).sum(axis=0),
+        'Kemeny-Platz': _places(kemeny),
+        'Borda-Platz': _places(borda_order),
+        'Borda-Punkte': borda,
+        'Median-Platz': _places(median_order),
+        'Median-Rang': 1 + median * (n - 1)
+    })
+    return table.iloc[kemeny].reset_index(drop=True)
@@ -0,0 +1,199 @@
+"""Statische Berichte (HTML und JSON) für viele Filterzustände, ohne Streamlit.
+
+Ein Bericht enthält die Kennzahlen, die 2x2 Matrix, beide Verteilungen und
+die Kategorie-Analyse eines Filterzustands, aufgebaut mit denselben Funktionen
+wie die App. Filterzustände stehen in einer JSON-Datei (Liste von Objekten,
+fehlende Felder bedeuten "alle"):
+
+    [{"name": "Monitoring", "mode": "Durchschnittswerte", "categories": ["Monitoring"]},
+     {"name": "Workshop", "sources": ["workshop"], "design_principles": ["..."]}]
+
+Zusätzlich lassen sich Berichte je Kategorie und je Quelle erzeugen:
+
+    python report.py filter.json --output berichte
+    python report.py --per-category --per-source --mode Durchschnittswerte --output berichte
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from figures import build_histogram_figure, build_view_figure
+from processing import compute_view, source_label
+from storage import open_store
+
+show_modes = ["Einzelne Datenpunkte", "Durchschnittswerte", "Dichteansicht", "Entwicklung"]
+
+# Zielverzeichnis und Prozesszahl, falls nicht angegeben
+report_output_path = Path('berichte')
+report_workers = os.cpu_count() or 1
+
+
+class ReportSpec(NamedTuple):
+    """Ein Filterzustand; None steht jeweils für alle Quellen, Kategorien bzw. Design Principles"""
+    name: str
+    mode: str = "Einzelne Datenpunkte"
+    sources: Optional[list] = None
+    categories: Optional[list] = None
+    design_principles: Optional[list] = None
+
+
+def load_specs(path):
+    """Liest Filterzustände aus einer JSON-Datei"""
+    with open(path, encoding='utf-8') as file:
+        entries = json.load(file)
+    specs = []
+    for position, entry in enumerate(entries):
+        unknown = set(entry) - set(ReportSpec._fields)
+        if unknown:
+            raise ValueError(f"{path}: unbekannte Felder in Eintrag {position}: {', '.join(sorted(unknown))}")
+        spec = ReportSpec(**{'name': f"bericht-{position + 1}", **entry})
+        if spec.mode not in show_modes:
+            raise ValueError(f"{path}: unbekannter Modus in Eintrag {position}: {spec.mode}")
+        specs.append(spec)
+    return specs
+
+
+def category_specs(df, mode):
+    """Ein Bericht je Kategorie"""
+    return [ReportSpec(category, mode, categories=[category]) for category in df['category'].unique().tolist()]
+
+
+def source_specs(ratings, mode):
+    """Ein Bericht je Quelle mit Bewertungen"""
+    return [ReportSpec(source_label(source), mode, sources=[source])
+            for source, count in zip(ratings.sources, ratings.source_counts) if count > 0]
+
+
+def _file_stem(name, used):
+    stem = re.sub(r'[^\w-]+', '_', name).strip('_').lower() or 'bericht'
+    candidate, counter = stem, 2
+    while candidate in used:
+        candidate, counter = f"{stem}_{counter}", counter + 1
+    used.add(candidate)
+    return candidate
+
+
+# Datenstand der Worker-Prozesse: beim Start per fork vom Elternprozess geerbt, sonst je Worker geladen
+_dataset = None
+
+
+def _init_worker(dataset_dir):
+    global _dataset
+    if _dataset is None:
+        _dataset = open_store(dataset_dir).state
+
+
+def render_report(spec, output_dir, stem):
+    """Rechnet einen Filterzustand und schreibt `<stem>.html` und `<stem>.json`"""
+    df, ratings = _dataset.df, _dataset.ratings
+    sources = spec.sources if spec.sources is not None else list(ratings.sources)
+    categories = spec.categories if spec.categories is not None else df['category'].unique().tolist()
+    dp_names = spec.design_principles if spec.design_principles is not None else df['name'].unique().tolist()
+
+    view = compute_view(df, ratings, sources, spec.mode, categories, dp_names)
+    viz_df = view.viz_df
+    summary = {'name': spec.name, 'html': f"{stem}.html", 'json': f"{stem}.json", 'points': len(viz_df)}
+    metrics = {
+        'Datenpunkte': len(viz_df),
+        '⌀ Relevanz': round(float(viz_df['relevanz'].mean()), 2) if len(viz_df) else None,
+        '⌀ Dringlichkeit': round(float(viz_df['dringlichkeit'].mean()), 2) if len(viz_df) else None,
+        'Kategorien': len(categories),
+        'Design Principles': len(dp_names)
+    }
+
+    figures = {}
+    if len(viz_df):
+        figures = {
+            'matrix': build_view_figure(view),
+            'relevanz': build_histogram_figure(view.relevanz_bins, "Verteilung der Relevanz-Bewertungen",
+                                               "Relevanz"),
+            'dringlichkeit': build_histogram_figure(view.dringlichkeit_bins,
+                                                    "Verteilung der Dringlichkeits-Bewertungen", "Dringlichkeit")
+        }
+    category_stats = view.category_stats
+
+    with open(output_dir / f"{stem}.json", 'w', encoding='utf-8') as file:
+        json.dump({
+            'spec': spec._asdict(),
+            'metrics': metrics,
+            'figures': {key: json.loads(figure.to_json()) for key, figure in figures.items()},
+            'category_stats': json.loads(category_stats.to_json(orient='split')) if len(category_stats) else None
+        }, file, ensure_ascii=False)
+
+    # plotly.js einmal pro Datei eingebettet, die Seite funktioniert ohne Netzzugriff
+    figure_html = [figure.to_html(full_html=False, include_plotlyjs=(position == 0))
+                   for position, figure in enumerate(figures.values())]
+    filters = (f"Modus: {spec.mode} | Quellen: {', '.join(source_label(source) for source in sources)} | "
+               f"{len(categories)} Kategorien | {len(dp_names)} Design Principles")
+    metric_items = ''.join(f"<li><b>{escape(key)}</b>: {value if value is not None else '-'}</li>"
+                           for key, value in metrics.items())
+    body = ''.join(figure_html) if figures else "<p>Keine Daten für die gewählten Filter verfügbar.</p>"
+    table = category_stats.to_html() if len(category_stats) else ''
+    with open(output_dir / f"{stem}.html", 'w', encoding='utf-8') as file:
+        file.write(
+            "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+            f"<title>Design Principles Analyse - {escape(spec.name)}</title></head><body>"
+            f"<h1>📊 Design Principles Analyse - {escape(spec.name)}</h1>"
+            f"<p>{escape(filters)}</p><ul>{metric_items}</ul>{body}"
+            f"<h2>🏷️ Kategorie-Analyse</h2>{table}</body></html>"
+        )
+    return summary
+
+
+def render_reports(specs, output_dir=None, workers=None, dataset_dir=None, state=None):
+    """Rendert alle Filterzustände parallel in einem Prozess-Pool.
+
+    Der Datenstand wird vor dem Start des Pools einmal geladen. Mit fork erben
+    die Worker ihn ohne Kopie (Copy-on-Write), sonst lädt jeder Worker die
+    speicherabgebildete Ablage selbst. `state` übergibt einen bereits geladenen
+    Datenstand. Liefert eine Übersicht je Bericht.
+    """
+    global _dataset
+    output_dir = Path(output_dir or report_output_path)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if workers is None:
+        workers = report_workers
+    _dataset = state if state is not None else open_store(dataset_dir).state
+
+    used = set()
+    stems = [_file_stem(spec.name, used) for spec in specs]
+    if workers <= 1 or len(specs) <= 1:
+        return [render_report(spec, output_dir, stem) for spec, stem in zip(specs, stems)]
+
+    context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+    with ProcessPoolExecutor(max_workers=min(workers, len(specs)), mp_context=context,
+                             initializer=_init_worker, initargs=(dataset_dir,)) as pool:
+        return list(pool.map(render_report, specs, [output_dir] * len(specs), stems))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Statische Berichte für Filterzustände erzeugen")
+    parser.add_argument('specs', nargs='?', help="JSON-Datei mit Filterzuständen")
+    parser.add_argument('--per-category', action='store_true', help="Zusätzlich ein Bericht je Kategorie")
+    parser.add_argument('--per-source', action='store_true', help="Zusätzlich ein Bericht je Quelle")
+    parser.add_argument('--mode', choices=show_modes, default=show_modes[0],
+                        help="Modus der Berichte je Kategorie/Quelle")
+    parser.add_argument('--output', default=str(report_output_path), help="Zielverzeichnis")
+    parser.add_argument('--workers', type=int, default=report_workers, help="Anzahl Prozesse")
+    parser.add_argument('--dataset', help="Parquet-Ablage (Standard: dataset/ neben der App, sonst data.py)")
+    args = parser.parse_args()
+
+    specs = load_specs(args.specs) if args.specs else []
+    state = None
+    if args.per_category or args.per_source:
+        state = open_store(args.dataset).state
+        if args.per_category:
+            specs += category_specs(state.df, args.mode)
+        if args.per_source:
+            specs += source_specs(state.ratings, args.mode)
+    if not specs:
+        parser.error("keine Filterzustände (JSON-Datei, --per-category oder --per-source angeben)")
+
+    for summary in render_reports(specs, args.output, args.workers, args.dataset, state):
+        print(f"{summary['html']}: {summary['points']} Datenpunkte ({summary['name']})")
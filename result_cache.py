@@ -0,0 +1,203 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+# Speicherrahmen des geteilten Caches (geschätzte Bytes aller Einträge)
+result_cache_max_bytes = 1024 ** 3
+
+# Stichprobe je Objektspalte, aus der die Größe der Python-Objekte hochgerechnet wird
+object_sample_size = 1000
+
+
+def filter_key(selected_sources, show_mode, selected_categories, selected_dp_names, dataset_version=0,
+               show_responses=False, source_weights=None):
+    """Normalisiert den Filterzustand: Reihenfolge und Duplikate spielen keine Rolle.
+
+    Die Version des Datenstands gehört zum Schlüssel, nachgeladene Bewertungen
+    erzeugen so neue Einträge statt veraltete Ansichten zu liefern.
+    `source_weights` (Quelle -> Gewicht) nur für gewichtete Ansichten angeben.
+    """
+    return (
+        dataset_version,
+        frozenset(selected_sources),
+        show_mode,
+        frozenset(selected_categories),
+        frozenset(selected_dp_names),
+        show_responses,
+        frozenset(source_weights.items()) if source_weights else None
+    )
+
+
+def _column_bytes(values):
+    """Spalte ohne Kopie: Puffergröße, bei Objektspalten hochgerechnet aus einer Stichprobe.
+
+    Mehrfach referenzierte Objekte (z. B. je Quellenmuster geteilte Listen)
+    zählen in der Stichprobe nur einmal.
+    """
+    nbytes = int(values.memory_usage(index=False, deep=False))
+    if values.dtype == object and len(values):
+        sample = values.to_numpy()[np.linspace(0, len(values) - 1, min(len(values), object_sample_size),
+                                               dtype=np.int64)]
+        distinct = {id(value): sys.getsizeof(value) for value in sample}
+        nbytes += int(sum(distinct.values()) / len(sample) * len(values))
+    return nbytes
+
+
+def estimated_bytes(value):
+    """Geschätzter Speicherbedarf eines Cache-Werts.
+
+    Werte mit eigener Methode `estimated_bytes` (z. B. `ViewResults`, deren
+    Tabellen erst nach und nach entstehen) schätzen sich selbst; DataFrames,
+    Arrays und Tupel aus Arrays werden über ihre Puffer gezählt.
+    """
+    estimate = getattr(value, 'estimated_bytes', None)
+    if callable(estimate):
+        return estimate()
+    if isinstance(value, pd.DataFrame):
+        return int(value.index.memory_usage()) + sum(_column_bytes(value[column]) for column in value.columns)
+    if isinstance(value, pd.Series):
+        return _column_bytes(value)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(estimated_bytes(item) for item in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(estimated_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Threadsicherer LRU-Cache mit Ablaufzeit für berechnete Ansichten.
+
+    Die Instanz wird über alle Sitzungen geteilt. Gespeicherte Ergebnisse dürfen
+    deshalb von Aufrufern nicht verändert werden. Begrenzt ist sowohl die Zahl
+    der Einträge als auch ihr geschätzter Speicherbedarf (`max_bytes`); da
+    Ansichten ihre Tabellen erst bei Bedarf berechnen, wird die Größe eines
+    Eintrags bei jedem Treffer neu geschätzt. Der zuletzt genutzte Eintrag
+    bleibt auch dann erhalten, wenn er allein den Rahmen übersteigt. Fragen
+    mehrere Sitzungen gleichzeitig nach einem fehlenden Schlüssel, rechnet nur
+    die erste, die übrigen warten auf ihr Ergebnis (`shared`).
+    """
+
+    def __init__(self, maxsize=64, ttl=3600, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = result_cache_max_bytes
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        """Eintrag oder None (Sperre gehalten), abgelaufene Einträge werden entfernt"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created, value = entry
+        if self.ttl is not None and time.monotonic() - created >= self.ttl:
+            self._remove(key)
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        self._resize(key, estimated_bytes(value))
+        self._evict()
+        return value
+
+    def _resize(self, key, nbytes):
+        self._bytes += nbytes - self._sizes.get(key, 0)
+        self._sizes[key] = nbytes
+
+    def _remove(self, key):
+        del self._entries[key]
+        self._bytes -= self._sizes.pop(key)
+
+    def _evict(self):
+        """Älteste Einträge entfernen, bis Anzahl und Speicherrahmen passen (der neueste bleibt)"""
+        while len(self._entries) > 1 and (len(self._entries) > self.maxsize or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def get(self, key):
+        """Liefert den Eintrag oder None, abgelaufene Einträge zählen als Fehlschlag"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        nbytes = estimated_bytes(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            self._resize(key, nbytes)
+            self._evict()
+
+    def get_or_compute(self, key, compute):
+        """Liefert das gecachte Ergebnis oder berechnet und speichert es, je Schlüssel nur einmal gleichzeitig"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = Future()
+                self.misses += 1
+                computing = True
+            else:
+                self.shared += 1
+                computing = False
+        if not computing:
+            # Bricht die rechnende Sitzung ab (Fehler, neuer Lauf), versucht es die wartende selbst
+            if pending.exception() is None:
+                return pending.result()
+            return self.get_or_compute(key, compute)
+
+        try:
+            value = compute()
+        except BaseException as error:
+            with self._lock:
+                del self._pending[key]
+            pending.set_exception(error)
+            raise
+        self.put(key, value)
+        with self._lock:
+            del self._pending[key]
+        pending.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'maxsize': self.maxsize,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'shared': self.shared,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
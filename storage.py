@@ -0,0 +1,404 @@
+"""Spaltenbasierte Ablage der Design-Principles-Daten als Parquet-Datensatz.
+
+Aufbau des Verzeichnisses:
+
+    dataset/design_principles.parquet   dp_id, name, category
+    dataset/ratings/part-*.parquet      dp_id, source, relevanz, dringlichkeit
+    dataset/responses/part-*.parquet    dp_id, source, respondent, relevanz, dringlichkeit
+
+`responses` enthält optional die Einzelantworten importierter Umfragen, deren
+Mittelwerte je DP als gewöhnliche Bewertungsteile vorliegen.
+
+Bewertungsteile werden nur angehängt, nie überschrieben. Neue Quellen kommen
+über ingest.py als weiterer Teil hinzu und werden von `DatasetStore` im
+laufenden Betrieb nachgeladen.
+
+Umwandeln der bestehenden Liste aus data.py:
+
+    python storage.py [zielverzeichnis]
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from analytics import RatingMoments, merge_moments, rating_moments
+from processing import (append_ratings, build_rating_table, compact_design_principles, decode_ratings,
+                        ratings_from_wide, ratings_moments)
+
+# Standardablage neben der App
+dataset_path = Path(__file__).with_name('dataset')
+dp_file_name = 'design_principles.parquet'
+ratings_dir_name = 'ratings'
+responses_dir_name = 'responses'
+
+# Zeilen pro Row-Group, damit große Korpora stückweise gelesen werden können
+row_group_size = 65536
+
+dp_schema = pa.schema([
+    pa.field('dp_id', pa.int32(), nullable=False),
+    pa.field('name', pa.string(), nullable=False),
+    pa.field('category', pa.dictionary(pa.int16(), pa.string()), nullable=False)
+])
+
+rating_schema = pa.schema([
+    pa.field('dp_id', pa.int32(), nullable=False),
+    pa.field('source', pa.dictionary(pa.int32(), pa.string()), nullable=False),
+    pa.field('relevanz', pa.float32(), nullable=False),
+    pa.field('dringlichkeit', pa.float32(), nullable=False)
+])
+
+response_schema = pa.schema([
+    pa.field('dp_id', pa.int32(), nullable=False),
+    pa.field('source', pa.dictionary(pa.int32(), pa.string()), nullable=False),
+    pa.field('respondent', pa.string(), nullable=False),
+    pa.field('relevanz', pa.float32(), nullable=False),
+    pa.field('dringlichkeit', pa.float32(), nullable=False)
+])
+
+
+def dataset_exists(path=None):
+    if path is None:
+        path = dataset_path
+    return (Path(path) / dp_file_name).exists()
+
+
+def rating_parts(path=None):
+    """Parquet-Teile der Bewertungen in Schreibreihenfolge"""
+    if path is None:
+        path = dataset_path
+    return sorted((Path(path) / ratings_dir_name).glob('part-*.parquet'))
+
+
+def response_parts(path=None):
+    """Parquet-Teile mit Einzelantworten in Schreibreihenfolge"""
+    if path is None:
+        path = dataset_path
+    return sorted((Path(path) / responses_dir_name).glob('part-*.parquet'))
+
+
+def _write_atomic(table, target, **kwargs):
+    """Schreibt erst in eine temporäre Datei und benennt dann um, Leser sehen nie halbe Dateien"""
+    temporary = target.with_name(target.name + '.tmp')
+    pq.write_table(table, temporary, compression='zstd', **kwargs)
+    os.replace(temporary, target)
+
+
+def _temporary_part(directory):
+    """Eindeutige temporäre Datei im Teileverzeichnis (passt nicht auf `part-*.parquet`)"""
+    handle, name = tempfile.mkstemp(prefix='.part-', suffix='.tmp', dir=directory)
+    os.close(handle)
+    return Path(name)
+
+
+def _publish_part(temporary, directory):
+    """Veröffentlicht eine fertig geschriebene Datei unter dem nächsten freien Namen `part-N.parquet`.
+
+    `os.link` legt den Namen exklusiv an und schlägt fehl, wenn er schon
+    existiert. Gleichzeitige Importe erhalten so verschiedene Teile, ein
+    bestehender Teil wird nie überschrieben.
+    """
+    number = len(list(directory.glob('part-*.parquet')))
+    while True:
+        part = directory / f"part-{number:05d}.parquet"
+        try:
+            os.link(temporary, part)
+        except FileExistsError:
+            number += 1
+            continue
+        temporary.unlink()
+        return part
+
+
+def _write_part(table, directory, **kwargs):
+    """Schreibt einen neuen Teil, ohne bestehende Teile zu überschreiben"""
+    temporary = _temporary_part(directory)
+    try:
+        pq.write_table(table, temporary, compression='zstd', **kwargs)
+        return _publish_part(temporary, directory)
+    finally:
+        temporary.unlink(missing_ok=True)
+
+
+def write_design_principles(df, path=None):
+    """Schreibt die DP-Tabelle (Zeilenposition = dp_id)"""
+    if path is None:
+        path = dataset_path
+    Path(path).mkdir(parents=True, exist_ok=True)
+    table = pa.table({
+        'dp_id': pa.array(np.arange(len(df), dtype=np.int32)),
+        'name': pa.array(df['name'].astype(str).tolist(), pa.string()),
+        'category': pa.array(df['category'].astype(str).tolist(), pa.string()).dictionary_encode()
+    }, schema=dp_schema)
+    _write_atomic(table, Path(path) / dp_file_name)
+
+
+def write_rating_rows(dp_id, sources, relevanz, dringlichkeit, path=None, part_sources=None):
+    """Hängt Bewertungen (je Zeile DP-Index und Quellkennung) als neuen Parquet-Teil an.
+
+    Die Zeilen werden nach Quelle sortiert geschrieben, damit Filter auf
+    `source` ganze Row-Groups überspringen können. Die Quellreihenfolge
+    (`part_sources`, sonst Reihenfolge des ersten Auftretens) steht in den
+    Schema-Metadaten.
+    """
+    if path is None:
+        path = dataset_path
+    ratings_dir = Path(path) / ratings_dir_name
+    ratings_dir.mkdir(parents=True, exist_ok=True)
+
+    sources = pd.Series(sources, dtype=str)
+    if part_sources is None:
+        part_sources = list(sources.unique())
+    source_codes = pd.Categorical(sources, categories=part_sources)
+    order = np.argsort(source_codes.codes, kind='stable')
+
+    table = pa.table({
+        'dp_id': pa.array(np.asarray(dp_id, dtype=np.int32)[order]),
+        'source': pa.DictionaryArray.from_pandas(source_codes[order]).cast(rating_schema.field('source').type),
+        'relevanz': pa.array(np.asarray(relevanz, dtype=np.float32)[order]),
+        'dringlichkeit': pa.array(np.asarray(dringlichkeit, dtype=np.float32)[order])
+    }, schema=rating_schema.with_metadata({'sources': json.dumps(list(part_sources))}))
+
+    return _write_part(table, ratings_dir, row_group_size=row_group_size)
+
+
+def write_rating_part(ratings, path=None, source_ids=None):
+    """Hängt die Einträge einer RatingTable (optional nur bestimmter Quellen) als neuen Parquet-Teil an"""
+    entries = np.arange(len(ratings.dp_id))
+    part_sources = list(ratings.sources)
+    if source_ids is not None:
+        entries = entries[np.isin(ratings.source_id[entries], source_ids)]
+        part_sources = [ratings.sources[j] for j in sorted(source_ids)]
+
+    return write_rating_rows(
+        ratings.dp_id[entries],
+        np.asarray(ratings.sources, dtype=object)[ratings.source_id[entries]],
+        decode_ratings(ratings.relevanz[entries]),
+        decode_ratings(ratings.dringlichkeit[entries]),
+        path, part_sources
+    )
+
+
+def write_response_chunks(chunks, source, path=None):
+    """Schreibt Einzelantworten einer Quelle stückweise in einen neuen Parquet-Teil.
+
+    `chunks` liefert DataFrames mit dp_id, respondent, relevanz und
+    dringlichkeit. Jeder Block wird sofort als Row-Group geschrieben, der
+    Speicherbedarf hängt also nur von der Blockgröße ab.
+    """
+    if path is None:
+        path = dataset_path
+    responses_dir = Path(path) / responses_dir_name
+    responses_dir.mkdir(parents=True, exist_ok=True)
+
+    temporary = _temporary_part(responses_dir)
+    schema = response_schema.with_metadata({'sources': json.dumps([source])})
+    source_type = response_schema.field('source').type
+    try:
+        with pq.ParquetWriter(temporary, schema, compression='zstd') as writer:
+            for chunk in chunks:
+                writer.write_table(pa.table({
+                    'dp_id': pa.array(chunk['dp_id'].to_numpy(np.int32)),
+                    'source': pa.DictionaryArray.from_arrays(np.zeros(len(chunk), dtype=np.int32),
+                                                             pa.array([source])).cast(source_type),
+                    'respondent': pa.array(chunk['respondent'].astype(str).to_numpy(), pa.string()),
+                    'relevanz': pa.array(chunk['relevanz'].to_numpy(np.float32)),
+                    'dringlichkeit': pa.array(chunk['dringlichkeit'].to_numpy(np.float32))
+                }, schema=schema), row_group_size=row_group_size)
+        return _publish_part(temporary, responses_dir)
+    finally:
+        temporary.unlink(missing_ok=True)
+
+
+def convert_design_principles(records, path=None):
+    """Schreibt die Liste im Format von `design_principles_data` als Parquet-Datensatz"""
+    if path is None:
+        path = dataset_path
+    df = pd.DataFrame(records)
+    write_design_principles(df, path)
+    write_rating_part(ratings_from_wide(df), path)
+    return path
+
+
+def stored_sources(path=None, parts=None):
+    """Quellen in Reihenfolge ihres ersten Auftretens (liest nur die Schema-Metadaten)"""
+    if parts is None:
+        parts = rating_parts(path)
+    sources = []
+    for part in parts:
+        metadata = pq.read_schema(part).metadata or {}
+        for source in json.loads(metadata.get(b'sources', b'[]')):
+            if source not in sources:
+                sources.append(source)
+    return sources
+
+
+def stored_response_sources(path=None):
+    """Quellen, für die Einzelantworten gespeichert sind"""
+    return stored_sources(parts=response_parts(path))
+
+
+def read_responses(path=None, sources=None, dp_ids=None):
+    """Einzelantworten als DataFrame, nur für die angegebenen Quellen und DPs gelesen"""
+    parts = [str(part) for part in response_parts(path)]
+    filters = []
+    if sources is not None:
+        filters.append(('source', 'in', list(sources)))
+    if dp_ids is not None:
+        filters.append(('dp_id', 'in', [int(dp) for dp in dp_ids]))
+    if not parts or (sources is not None and not sources) or (dp_ids is not None and not len(dp_ids)):
+        table = response_schema.empty_table()
+    else:
+        table = pq.read_table(parts, schema=response_schema, filters=filters or None, memory_map=True)
+    return table.to_pandas()
+
+
+def read_design_principles(path=None):
+    """DP-Tabelle als kompaktes DataFrame in dp_id-Reihenfolge"""
+    if path is None:
+        path = dataset_path
+    dp_table = pq.read_table(Path(path) / dp_file_name, memory_map=True).sort_by('dp_id')
+    return compact_design_principles(dp_table.select(['name', 'category']).to_pandas())
+
+
+def read_rating_rows(parts, sources):
+    """Bewertungszeilen der Teile für die Quellen `sources` als pyarrow-Tabelle"""
+    if parts and sources:
+        return pq.read_table([str(part) for part in parts], schema=rating_schema,
+                             filters=[('source', 'in', list(sources))], memory_map=True)
+    return rating_schema.empty_table()
+
+
+def read_dataset(path=None, sources=None, parts=None):
+    """Liest DP-Tabelle und Bewertungen speicherabgebildet, optional nur für bestimmte Quellen.
+
+    Liefert das kompakte DP-DataFrame und die RatingTable.
+    """
+    if path is None:
+        path = dataset_path
+    if parts is None:
+        parts = rating_parts(path)
+    available = stored_sources(path, parts)
+    if sources is None:
+        sources = available
+    sources = [source for source in sources if source in available]
+
+    df = read_design_principles(path)
+    table = read_rating_rows(parts, sources)
+    source_id = pd.Categorical(table.column('source').to_pandas().astype(str), categories=sources).codes
+
+    ratings = build_rating_table(
+        sources, len(df),
+        table.column('dp_id').to_numpy(),
+        source_id,
+        table.column('relevanz').to_numpy(),
+        table.column('dringlichkeit').to_numpy(),
+        df['name'].astype(str).to_numpy()
+    )
+    return df, ratings
+
+
+class DatasetState(NamedTuple):
+    """Ein unveränderlicher Datenstand: DP-Tabelle, Bewertungen und fortgeschriebene Momente je DP"""
+    df: pd.DataFrame
+    ratings: object
+    moments: RatingMoments
+    version: int
+    response_sources: tuple = ()
+
+
+class DatasetStore:
+    """Prozessweit geteilter Datenstand, der neu angehängte Bewertungsteile nachlädt.
+
+    Beim Nachladen werden nur die neuen Teile gelesen: die Einträge werden in
+    eine neue RatingTable eingemischt und die Momente je DP mit den Momenten
+    der neuen Bewertungen zusammengefasst. Bestehende Zustände bleiben
+    unverändert, laufende Sitzungen rechnen mit ihrem Stand weiter. Ohne `path`
+    (Daten aus data.py) gibt es nichts nachzuladen.
+    """
+
+    def __init__(self, df, ratings, path=None, parts=()):
+        self.path = path
+        response_sources = tuple(stored_response_sources(path)) if path is not None else ()
+        self.state = DatasetState(df, ratings, ratings_moments(ratings), 0, response_sources)
+        self._parts = set(parts)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path=None):
+        if path is None:
+            path = dataset_path
+        parts = rating_parts(path)
+        df, ratings = read_dataset(path, parts=parts)
+        return cls(df, ratings, path, parts)
+
+    def pending_parts(self):
+        """Teile, die seit dem letzten Laden hinzugekommen sind (nur ein Verzeichnislisting)"""
+        if self.path is None:
+            return []
+        return [part for part in rating_parts(self.path) if part not in self._parts]
+
+    def refresh(self):
+        """Lädt neue Teile nach und liefert den aktuellen Datenstand"""
+        if not self.pending_parts():
+            return self.state
+        with self._lock:
+            parts = self.pending_parts()
+            if parts:
+                self.state = self._apply_parts(self.state, parts)
+                self._parts.update(parts)
+            return self.state
+
+    def _apply_parts(self, state, parts):
+        ratings = state.ratings
+        sources = list(ratings.sources)
+        sources += [source for source in stored_sources(parts=parts) if source not in sources]
+
+        table = read_rating_rows(parts, sources)
+        dp_id = table.column('dp_id').to_numpy()
+        df = state.df
+        if len(dp_id) and int(dp_id.max()) >= len(df):
+            # Neue Design Principles: DP-Tabelle neu lesen, sie wächst nur hinten
+            df = read_design_principles(self.path)
+        source_id = pd.Categorical(table.column('source').to_pandas().astype(str), categories=sources).codes
+        relevanz = table.column('relevanz').to_numpy()
+        dringlichkeit = table.column('dringlichkeit').to_numpy()
+
+        ratings = append_ratings(ratings, sources, len(df), dp_id, source_id, relevanz, dringlichkeit,
+                                 df['name'].astype(str).to_numpy())
+        complete = ~(np.isnan(relevanz) | np.isnan(dringlichkeit))
+        batch = rating_moments(len(df), dp_id[complete], np.column_stack([relevanz, dringlichkeit])[complete])
+        return DatasetState(df, ratings, merge_moments(state.moments, batch), state.version + 1,
+                            tuple(stored_response_sources(self.path)))
+
+    def read_responses(self, sources, dp_ids):
+        """Einzelantworten der ausgewählten Quellen mit Antworten, erst bei Bedarf gelesen"""
+        sources = [source for source in sources if source in self.state.response_sources]
+        return read_responses(self.path, sources, dp_ids)
+
+
+def open_store(path=None):
+    """Datenstand aus der Parquet-Ablage oder, falls keine existiert, aus der Liste in data.py"""
+    if dataset_exists(path):
+        return DatasetStore.open(path)
+
+    from data import design_principles_data
+    df = pd.DataFrame(design_principles_data)
+    # Quellen aus den Spalten ableiten und Bewertungen einmalig in Koordinaten-Einträge überführen
+    return DatasetStore(compact_design_principles(df), ratings_from_wide(df))
+
+
+if __name__ == '__main__':
+    from data import design_principles_data
+
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else dataset_path
+    convert_design_principles(design_principles_data, target)
+    print(f"{len(design_principles_data)} Design Principles nach {target} geschrieben")
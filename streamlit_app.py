@@ -1,10 +1,25 @@
+import functools
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
-from plotly.subplots import make_subplots
-from data import design_principles_data
+from analytics import (QuadrantThresholds, bootstrap_confidence, bootstrap_resamples, classify_quadrants,
+                       default_quadrant_threshold, low_priorities, priority_top_k, quadrant_counts, quadrant_members,
+                       quadrant_threshold_methods, quadrant_thresholds, top_priorities, top_priorities_by_category)
+from export import export_file, export_formats
+from figures import build_histogram_figure, build_view_figure
+from instrumentation import (finish_recording, is_recording, log_stages, stage, stage_log_path, start_recording,
+                             stop_memory_tracing)
+from processing import compute_view, memory_report, moments_table, source_label, weighted_view
+from ranking import rank_aggregation, rank_criteria
+from result_cache import ResultCache, filter_key
+from storage import open_store
+
+# Abstand, in dem der Datensatz auf neu angehängte Bewertungsteile geprüft wird
+dataset_poll_seconds = 5
+
+# Abgeleitete DataFrames teilen ihre Daten mit der Quelle, bis sie verändert werden
+pd.set_option('mode.copy_on_write', True)
 
 # Seitenkonfiguration
 st.set_page_config(
@@ -18,46 +33,122 @@ st.title("📊 Design Principles Analyse - 2x2 Matrix")
 st.markdown("---")
 
 
-# Daten laden aus zentraler Funktion
-@st.cache_data
+# Daten laden aus zentraler Funktion (einmal pro Prozess, von allen Sitzungen nur lesend genutzt)
+@st.cache_resource
 def load_data():
     """Lädt alle Design Principles Daten inklusive Interview 5 und neue DPs"""
-    return pd.DataFrame(design_principles_data)
+    # Spaltenbasierte Ablage (siehe storage.py) mit Nachladen neuer Teile, sonst data.py
+    return open_store()
+
+
+# Geteilter Ergebnis-Cache für alle Sitzungen
+@st.cache_resource
+def get_result_cache():
+    """Ein LRU-Cache pro Prozess für bereits berechnete Filteransichten, begrenzt auf `result_cache_max_bytes`"""
+    return ResultCache(maxsize=64, ttl=3600)
 
 
-# Daten laden
-df = load_data()
+def recorded_fragment(function):
+    """Misst auch Läufe, in denen nur das Fragment neu läuft.
+
+    Im vollen Skriptlauf misst dessen Recorder mit. Läuft nur das Fragment
+    (Klick, Wechsel der Detailansicht), ist dieser schon beendet; dann misst ein
+    eigener Recorder, dessen Werte im Bereich "Messung" erscheinen und bei
+    aktivierter Logdatei geschrieben werden.
+    """
+    @functools.wraps(function)
+    def run(*args, **kwargs):
+        if is_recording():
+            return function(*args, **kwargs)
+        fragment_recorder = start_recording(st.session_state.get('instrumentation_enabled', False))
+        try:
+            return function(*args, **kwargs)
+        finally:
+            if fragment_recorder is not None:
+                st.session_state['fragment_recorder'] = fragment_recorder
+                if st.session_state.get('instrumentation_log', False):
+                    log_stages(fragment_recorder)
+            finish_recording()
+    return run
+
+
+# Optionale Messung der Verarbeitungsschritte (Schalter im Bereich "Messung" der Sidebar)
+recorder = start_recording(st.session_state.get('instrumentation_enabled', False))
+
+# Daten laden (inklusive seit dem letzten Lauf angehängter Bewertungen)
+with stage('load_data'):
+    store = load_data()
+    dataset = store.refresh()
+df, ratings = dataset.df, dataset.ratings
+
+
+@st.fragment(run_every=dataset_poll_seconds)
+def watch_dataset():
+    """Startet die App neu, sobald ingest.py einen neuen Bewertungsteil geschrieben hat"""
+    if store.pending_parts():
+        st.rerun()
+
+
+if store.path is not None:
+    watch_dataset()
 
 # Sidebar für Kontrollen
 st.sidebar.header("🎛️ Analyse-Einstellungen")
 
 # Datenquellen auswählen
 st.sidebar.subheader("Datenquellen")
-all_sources = ['workshop', 'I1', 'I2', 'I3', 'I4', 'I5', 'I6']
-source_labels = {
-    'workshop': 'Workshop',
-    'I1': 'Interview 1',
-    'I2': 'Interview 2',
-    'I3': 'Interview 3',
-    'I4': 'Interview 4',
-    'I5': 'Interview 5',
-    'I6': 'Interview 6'
-}
-
 selected_sources = []
-for source in all_sources:
-    if st.sidebar.checkbox(source_labels[source], value=source in ['workshop', 'I1', 'I2', 'I3', 'I4', 'I5'],
-                           key=source):
+for source, count in zip(ratings.sources, ratings.source_counts):
+    # Quellen ohne Bewertungen sind anfangs abgewählt
+    if st.sidebar.checkbox(source_label(source), value=bool(count > 0), key=source):
         selected_sources.append(source)
 
 # Darstellungsmodus
 st.sidebar.subheader("Darstellungsmodus")
 show_mode = st.sidebar.radio(
     "Ansicht wählen:",
-    ["Einzelne Datenpunkte", "Durchschnittswerte"],
-    index=0
+    ["Einzelne Datenpunkte", "Durchschnittswerte", "Dichteansicht", "Entwicklung"],
+    index=0,
+    help="Entwicklung: Durchschnittswerte nach jeder weiteren Quelle (Workshop, dann Interview für Interview) als "
+         "Animation"
 )
 
+# Einzelantworten importierter Umfragen statt ihrer Mittelwerte zeigen (nur ohne Durchschnittsbildung)
+averaged = show_mode in ("Durchschnittswerte", "Entwicklung")
+show_responses = False
+if dataset.response_sources:
+    show_responses = st.sidebar.checkbox(
+        "Einzelantworten der Umfragen",
+        value=False,
+        disabled=averaged,
+        help="Zeigt je Umfrage-Teilnehmer einen Punkt statt des Mittelwerts der Umfrage"
+    ) and not averaged
+
+# Gewichte der Quellen für Durchschnittswerte (z. B. Anzahl Teilnehmender), relativ zueinander
+source_weights = None
+with st.sidebar.expander("⚖️ Quellengewichte"):
+    weights = {
+        source: st.slider(
+            source_label(source),
+            min_value=0.0,
+            max_value=20.0,
+            value=1.0,
+            step=0.5,
+            key=f"weight_{source}",
+            disabled=show_mode != "Durchschnittswerte"
+        )
+        for source in selected_sources
+    }
+    if show_mode != "Durchschnittswerte":
+        st.caption("Gewichte wirken nur auf die Durchschnittswerte.")
+    elif not any(weights.values()):
+        # Ohne positives Gewicht trägt keine Quelle bei, die Ansicht bleibt leer
+        st.warning("Alle Gewichte sind 0, keine Quelle geht in die Durchschnittswerte ein.")
+        source_weights = weights
+    elif len(set(weights.values())) > 1:
+        # Gleiche Gewichte ergeben den einfachen Durchschnitt
+        source_weights = weights
+
 # Kategoriefilter
 st.sidebar.subheader("Kategorien")
 categories = df['category'].unique().tolist()
@@ -77,117 +168,240 @@ selected_dp_names = st.sidebar.multiselect(
     help="Wählen Sie spezifische Design Principles für die Analyse aus"
 )
 
-# Farbpalette für Kategorien
-category_colors = {
-    'Umsetzung': '#FF6B6B',
-    'User Interface': '#4ECDC4',
-    'Interaktion': '#45B7D1',
-    'Monitoring': '#96CEB4',
-    'Systembeschreibung/Systemarchitektur': '#FFEAA7',
-    'Fallbasiert': '#DDA0DD'
+# Quadrantengrenzen der 2x2 Matrix
+st.sidebar.subheader("Quadranten")
+threshold_method = st.sidebar.radio(
+    "Grenzen:",
+    quadrant_threshold_methods,
+    horizontal=True,
+    key='quadrant_method',
+    help="Median/Mittelwert: Grenzen aus den Punkten der aktuellen Ansicht"
+)
+fixed_thresholds = None
+if threshold_method == 'Fest':
+    fixed_thresholds = QuadrantThresholds(
+        dringlichkeit=st.sidebar.slider("Grenze Dringlichkeit", 0.0, 10.0, default_quadrant_threshold, 0.5,
+                                        key='quadrant_dringlichkeit'),
+        relevanz=st.sidebar.slider("Grenze Relevanz", 0.0, 10.0, default_quadrant_threshold, 0.5,
+                                   key='quadrant_relevanz')
+    )
+
+# Visualisierungsdaten erstellen (aus dem Cache, falls der Filterzustand schon berechnet wurde)
+result_cache = get_result_cache()
+
+
+def compute_selected_view():
+    """Berechnet die Ansicht des aktuellen Filterzustands (nur bei Cache-Fehlschlag)"""
+    responses = None
+    if show_responses:
+        # Einzelantworten nur für die gefilterten Quellen und DPs aus dem Datensatz lesen
+        dp_ids = np.flatnonzero(df['category'].isin(selected_categories) & df['name'].isin(selected_dp_names))
+        responses = store.read_responses(selected_sources, dp_ids)
+    return compute_view(df, ratings, selected_sources, show_mode, selected_categories, selected_dp_names, responses)
+
+
+with stage('compute_view'):
+    view = result_cache.get_or_compute(
+        filter_key(selected_sources, show_mode, selected_categories, selected_dp_names, dataset.version,
+                   show_responses),
+        compute_selected_view
+    )
+    if source_weights is not None:
+        # Nur die Positionen werden neu gewichtet, die ungewichtete Ansicht bleibt im Cache
+        average_view = view
+        view = result_cache.get_or_compute(
+            filter_key(selected_sources, show_mode, selected_categories, selected_dp_names, dataset.version,
+                       show_responses, source_weights),
+            lambda: weighted_view(df, ratings, average_view, selected_sources, source_weights)
+        )
+viz_df = view.viz_df
+thresholds = quadrant_thresholds(viz_df, threshold_method, fixed_thresholds)
+
+
+# Detailansichten: jede Funktion zeichnet eine Ansicht und fordert nur die Tabellen an, die sie zeigt
+def render_data_table(view):
+    viz_df = view.viz_df
+    st.dataframe(
+        viz_df[['name', 'category', 'relevanz', 'dringlichkeit', 'source']].round(2),
+        use_container_width=True
+    )
+
+    with st.expander("📐 Gesamtstatistik je Design Principle (alle Quellen)"):
+        # Fortgeschriebene Momente, beim Nachladen nur um die neuen Bewertungen ergänzt
+        st.dataframe(moments_table(df, dataset.moments, view.selected_dp_names).round(2), use_container_width=True)
+
+
+def render_distribution(view):
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Relevanz-Verteilung (Klassen serverseitig gezählt)
+        fig_rel = build_histogram_figure(view.relevanz_bins, "Verteilung der Relevanz-Bewertungen", "Relevanz")
+        st.plotly_chart(fig_rel, use_container_width=True)
+
+    with col2:
+        # Dringlichkeit-Verteilung (Klassen serverseitig gezählt)
+        fig_dring = build_histogram_figure(view.dringlichkeit_bins, "Verteilung der Dringlichkeits-Bewertungen",
+                                           "Dringlichkeit")
+        st.plotly_chart(fig_dring, use_container_width=True)
+
+
+def render_priorities(view):
+    viz_df = view.viz_df
+    # Score und Sortierung liegen mit der Ansicht im Ergebnis-Cache, hier werden nur k Zeilen gelesen
+    index = view.priorities
+    col_k, col_mode = st.columns([1, 3])
+    with col_k:
+        k = st.number_input("Anzahl", min_value=1, max_value=len(viz_df), value=min(priority_top_k, len(viz_df)),
+                            key='priority_k')
+    with col_mode:
+        per_category = st.toggle("Je Kategorie", key='priority_per_category')
+
+    if per_category:
+        st.subheader("🔝 Top Prioritäten je Kategorie")
+        st.dataframe(top_priorities_by_category(viz_df, index, k).round(2), use_container_width=True)
+        return
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("🔝 Top Prioritäten")
+        st.dataframe(top_priorities(viz_df, index, k).round(2), use_container_width=True)
+
+    with col2:
+        st.subheader("📉 Niedrige Prioritäten")
+        st.dataframe(low_priorities(viz_df, index, k).round(2), use_container_width=True)
+
+
+def render_rankings(view):
+    st.subheader("🏅 Konsens-Rangfolge der Quellen")
+    criterion = st.radio("Rangfolge nach", rank_criteria, horizontal=True, key='ranking_criterion')
+
+    # Je Filterzustand und Kriterium einmal berechnet und im geteilten Cache abgelegt
+    key = ('rank_aggregation', criterion,
+           filter_key(selected_sources, None, selected_categories, selected_dp_names, dataset.version))
+    ranking_df = result_cache.get_or_compute(key, lambda: rank_aggregation(
+        df, ratings, selected_sources, selected_categories, selected_dp_names, criterion))
+    if not ranking_df.empty:
+        st.dataframe(ranking_df.round(2), use_container_width=True, hide_index=True)
+        st.caption(
+            "Jede Quelle ordnet die von ihr bewerteten Design Principles, nicht bewertete teilen sich die letzten "
+            "Plätze dieser Quelle - wenige Bewertungen senken also den Rang. Borda: mittlere Punkte über alle "
+            "Quellen (1 = erster, 0 = letzter Platz). Median-Rang: Median der relativen Plätze, auf die Anzahl "
+            "der Design Principles skaliert. Kemeny: Reihenfolge mit möglichst wenigen widersprechenden "
+            "Paarvergleichen (Näherung)."
+        )
+    else:
+        st.info("Keine Rangfolge möglich - mindestens zwei Quellen und zwei Design Principles auswählen.")
+
+
+def render_quadrants(view):
+    viz_df = view.viz_df
+    st.subheader("🧭 Quadranten")
+    st.caption(f"Grenzen: Dringlichkeit {thresholds.dringlichkeit:.2f}, Relevanz {thresholds.relevanz:.2f} "
+               f"({threshold_method}); Werte ab der Grenze zählen als hoch")
+    by = st.radio("Aufteilen nach", ['Kategorie', 'Quelle'], horizontal=True, key='quadrant_by')
+    column = 'category' if by == 'Kategorie' else 'source'
+
+    # Eine Array-Operation über alle Punkte, daher bei jeder Grenzänderung neu statt gecacht
+    quadrants = classify_quadrants(viz_df, thresholds)
+    st.write("**Punkte je Quadrant**")
+    st.dataframe(quadrant_counts(viz_df, quadrants, column).rename_axis(by), use_container_width=True)
+    st.write("**Design Principles je Quadrant**")
+    st.dataframe(quadrant_members(viz_df, quadrants, column).rename(columns={column: by}),
+                 use_container_width=True, hide_index=True)
+
+
+def render_consistency(view):
+    st.subheader("🎯 Konsistenz zwischen Quellen")
+
+    consistency_df = view.consistency_df
+    if not consistency_df.empty:
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.write("**🎯 Konsistenteste Bewertungen** (niedrige Standardabweichung)")
+            st.dataframe(consistency_df.head(10).round(2), use_container_width=True)
+
+        with col2:
+            st.write("**⚠️ Inkonsistenteste Bewertungen** (hohe Standardabweichung)")
+            st.dataframe(consistency_df.tail(10).round(2), use_container_width=True)
+
+        st.caption(
+            f"KI: {bootstrap_confidence:.0%}-Bootstrap-Konfidenzintervall des Mittelwerts "
+            f"({bootstrap_resamples} Stichproben je Design Principle)"
+        )
+    else:
+        st.info("Keine Konsistenz-Analyse möglich - nur eine Quelle pro Design Principle ausgewählt.")
+
+
+detail_views = {
+    "📋 Datentabelle": ('tab_table', render_data_table),
+    "📈 Verteilungsanalyse": ('tab_distribution', render_distribution),
+    "🔍 Top/Low Performer": ('tab_priority', render_priorities),
+    "🏅 Rangfolge": ('tab_ranking', render_rankings),
+    "🧭 Quadranten": ('tab_quadrants', render_quadrants),
+    "🎯 Konsistenz-Analyse": ('tab_consistency', render_consistency)
 }
 
 
-# Datenverarbeitung für Visualisierung
-def prepare_visualization_data(df, selected_sources, show_mode, selected_categories, selected_dp_names):
-    # Nach Kategorien und Design Principles filtern
-    filtered_df = df[
-        (df['category'].isin(selected_categories)) &
-        (df['name'].isin(selected_dp_names))
-        ]
-
-    plot_data = []
-
-    for _, row in filtered_df.iterrows():
-        if show_mode == "Durchschnittswerte":
-            # Durchschnittswerte berechnen
-            relevanz_values = []
-            dringlichkeit_values = []
-            sources_used = []
-
-            for source in selected_sources:
-                rel_col = f"{source}_relevanz"
-                dring_col = f"{source}_dringlichkeit"
-
-                if rel_col in row and row[rel_col] is not None:
-                    relevanz_values.append(row[rel_col])
-                    dringlichkeit_values.append(row[dring_col])
-                    sources_used.append(source_labels[source])
-
-            if relevanz_values:
-                avg_relevanz = np.mean(relevanz_values)
-                avg_dringlichkeit = np.mean(dringlichkeit_values)
-
-                plot_data.append({
-                    'name': row['name'],
-                    'category': row['category'],
-                    'relevanz': avg_relevanz,
-                    'dringlichkeit': avg_dringlichkeit,
-                    'source': f"Durchschnitt ({', '.join(sources_used)})",
-                    'sources_list': sources_used,
-                    'color': category_colors.get(row['category'], '#999999')
-                })
-        else:
-            # Einzelne Datenpunkte
-            for source in selected_sources:
-                rel_col = f"{source}_relevanz"
-                dring_col = f"{source}_dringlichkeit"
-
-                if rel_col in row and row[rel_col] is not None:
-                    plot_data.append({
-                        'name': row['name'],
-                        'category': row['category'],
-                        'relevanz': row[rel_col],
-                        'dringlichkeit': row[dring_col],
-                        'source': source_labels[source],
-                        'sources_list': [source_labels[source]],
-                        'color': category_colors.get(row['category'], '#999999')
-                    })
-
-    return pd.DataFrame(plot_data)
-
-
-# NEUE FUNKTION: Daten für verbessertes Hovering gruppieren
-def prepare_grouped_visualization_data(viz_df):
-    """Gruppiert Daten mit gleichen Koordinaten für verbessertes Hovering"""
-    if viz_df.empty:
-        return viz_df
-
-    # Gruppiere nach name, category, relevanz, dringlichkeit
-    grouped_data = []
-
-    for (name, category, relevanz, dringlichkeit), group in viz_df.groupby(
-            ['name', 'category', 'relevanz', 'dringlichkeit']):
-        sources = group['source'].tolist()
-        sources_list = []
-        for source_list in group['sources_list']:
-            sources_list.extend(source_list)
-
-        # Entferne Duplikate und sortiere
-        unique_sources = sorted(list(set(sources_list)))
-
-        grouped_data.append({
-            'name': name,
-            'category': category,
-            'relevanz': relevanz,
-            'dringlichkeit': dringlichkeit,
-            'sources': ', '.join(sources),
-            'sources_list': unique_sources,
-            'sources_count': len(unique_sources),
-            'color': category_colors.get(category, '#999999')
-        })
-
-    return pd.DataFrame(grouped_data)
-
-
-# Visualisierungsdaten erstellen
-viz_df = prepare_visualization_data(df, selected_sources, show_mode, selected_categories, selected_dp_names)
+@st.fragment
+@recorded_fragment
+def detail_analysis(view):
+    """Zeichnet nur die gewählte Detailansicht, ein Wechsel läuft ohne Neuberechnung der Seite"""
+    selected_view = st.radio(
+        "Detailansicht",
+        list(detail_views),
+        horizontal=True,
+        key='detail_view',
+        label_visibility="collapsed"
+    )
+    stage_name, render = detail_views[selected_view]
+    with stage(stage_name):
+        render(view)
+
+
+@st.fragment
+@recorded_fragment
+def export_panel(view):
+    """Erzeugt die Exportdatei erst auf Anforderung, der Klick läuft nur im Fragment"""
+    export_format = st.radio(
+        "Format",
+        list(export_formats),
+        horizontal=True,
+        key='export_format',
+        help="Parquet: ZIP mit Plotdaten, gruppierter Ansicht und Konsistenz-Tabelle, Spaltentypen bleiben erhalten"
+    )
+    if st.button("📄 Export vorbereiten", key='prepare_export'):
+        file_name, mime = export_formats[export_format]
+        with stage(f"export_{export_format.lower()}"):
+            # Blockweise in eine temporäre Datei geschrieben; Streamlit hält nur die fertigen Bytes, keinen
+            # zusätzlichen Gesamt-String
+            with export_file(view, export_format) as export:
+                st.download_button(
+                    label=f"📊 Daten als {export_format} herunterladen",
+                    data=export.read(),
+                    file_name=file_name,
+                    mime=mime
+                )
+
+
+@st.fragment
+@recorded_fragment
+def memory_panel(view):
+    """Speicherbedarf nur auf Anforderung ermitteln (zählt alle Zeichenketten der Ansicht)"""
+    if st.toggle("Speicherbedarf ermitteln", key='show_memory_report'):
+        report = memory_report(df, ratings, view.viz_df, view.grouped_viz_df)
+        st.dataframe(report, use_container_width=True)
+        st.caption(
+            f"Kompakte Darstellung: {report.loc['Summe', 'Nachher (kB)']:.1f} kB statt "
+            f"{report.loc['Summe', 'Vorher (kB)']:.1f} kB (float64/Strings). Basisdaten und Ansichten werden "
+            f"prozessweit zwischen allen Sitzungen geteilt."
+        )
+
 
 # Hauptbereich
 if not viz_df.empty:
-    # Daten für verbessertes Hovering gruppieren
-    grouped_viz_df = prepare_grouped_visualization_data(viz_df)
-
     # Statistiken anzeigen
     col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -213,103 +427,10 @@ if not viz_df.empty:
     st.markdown("---")
 
     # 2x2 Matrix erstellen
-    fig = go.Figure()
-
-    # Quadranten-Hintergrund
-    fig.add_shape(
-        type="rect",
-        x0=5, y0=0, x1=10, y1=5,
-        fillcolor="rgba(255,0,0,0.1)",
-        line=dict(width=0),
-        layer="below"
-    )
-    fig.add_shape(
-        type="rect",
-        x0=5, y0=5, x1=10, y1=10,
-        fillcolor="rgba(255,0,0,0.2)",
-        line=dict(width=0),
-        layer="below"
-    )
-    fig.add_shape(
-        type="rect",
-        x0=0, y0=0, x1=5, y1=5,
-        fillcolor="rgba(255,255,0,0.1)",
-        line=dict(width=0),
-        layer="below"
-    )
-    fig.add_shape(
-        type="rect",
-        x0=0, y0=5, x1=5, y1=10,
-        fillcolor="rgba(0,255,0,0.1)",
-        line=dict(width=0),
-        layer="below"
-    )
-
-    # Datenpunkte nach Kategorie gruppieren - mit verbessertem Hovering
-    for category in grouped_viz_df['category'].unique():
-        category_data = grouped_viz_df[grouped_viz_df['category'] == category]
-
-        # Erstelle Hover-Text mit allen Quellen
-        hover_text = []
-        for _, row in category_data.iterrows():
-            sources_text = ', '.join(row['sources_list'])
-            if row['sources_count'] > 1:
-                hover_text.append(f"{row['name']}<br>Quellen: {sources_text}<br>({row['sources_count']} Quellen)")
-            else:
-                hover_text.append(f"{row['name']}<br>Quelle: {sources_text}")
-
-        fig.add_trace(go.Scatter(
-            x=category_data['dringlichkeit'],  # x-Achse ist jetzt Dringlichkeit
-            y=category_data['relevanz'],      # y-Achse ist jetzt Relevanz
-            mode='markers',
-            name=category,
-            text=hover_text,
-            textposition="top center",
-            marker=dict(
-                size=12 + category_data['sources_count'] * 2,  # Größe basierend auf Anzahl Quellen
-                color=category_colors.get(category, '#999999'),
-                opacity=0.8,
-                line=dict(width=2, color='white'),
-                symbol='circle'
-            ),
-            hovertemplate='<b>%{text}</b><br>Dringlichkeit: %{x}<br>Relevanz: %{y}<extra></extra>'
-        ))
-
-    # Layout anpassen
-    fig.update_layout(
-        title={
-            'text': f"Design Principles Matrix - {show_mode}",
-            'x': 0.5,
-            'font': {'size': 20}
-        },
-        xaxis_title="Dringlichkeit",  # Titel der x-Achse geändert
-        yaxis_title="Relevanz",       # Titel der y-Achse geändert
-        xaxis=dict(range=[0, 10], dtick=1, gridcolor='lightgray'),
-        yaxis=dict(range=[0, 10], dtick=1, gridcolor='lightgray'),
-        width=800,
-        height=600,
-        plot_bgcolor='white',
-        showlegend=True,
-        legend=dict(
-            orientation="v",
-            yanchor="top",
-            y=1,
-            xanchor="left",
-            x=1.02
-        )
-    )
-
-    # Quadranten-Labels hinzufügen
-    fig.add_annotation(x=7.5, y=2.5, text="Hoch Dringlich<br>Wenig Relevant", showarrow=False,
-                       font=dict(size=14, color="gray"), bgcolor="rgba(255,255,255,0.8)")
-    fig.add_annotation(x=7.5, y=7.5, text="Hoch Dringlich<br>Sehr Relevant", showarrow=False,
-                       font=dict(size=14, color="gray"), bgcolor="rgba(255,255,255,0.8)")
-    fig.add_annotation(x=2.5, y=2.5, text="Wenig Dringlich<br>Wenig Relevant", showarrow=False,
-                       font=dict(size=14, color="gray"), bgcolor="rgba(255,255,255,0.8)")
-    fig.add_annotation(x=2.5, y=7.5, text="Wenig Dringlich<br>Sehr Relevant", showarrow=False,
-                       font=dict(size=14, color="gray"), bgcolor="rgba(255,255,255,0.8)")
-
-    st.plotly_chart(fig, use_container_width=True)
+    with stage('matrix_figure'):
+        # Dichteraster oder gruppierte Punkte für verbessertes Hovering
+        fig = build_view_figure(view, thresholds)
+        st.plotly_chart(fig, use_container_width=True)
 
     # Zusätzliche Info
     st.info(
@@ -318,107 +439,15 @@ if not viz_df.empty:
     # Detailanalyse
     st.markdown("---")
     st.subheader("📊 Detailanalyse")
-
-    # Tabs für verschiedene Ansichten
-    tab1, tab2, tab3, tab4 = st.tabs(
-        ["📋 Datentabelle", "📈 Verteilungsanalyse", "🔍 Top/Low Performer", "🎯 Konsistenz-Analyse"])
-
-    with tab1:
-        st.dataframe(
-            viz_df[['name', 'category', 'relevanz', 'dringlichkeit', 'source']].round(2),
-            use_container_width=True
-        )
-
-    with tab2:
-        col1, col2 = st.columns(2)
-
-        with col1:
-            # Relevanz-Verteilung
-            fig_rel = px.histogram(
-                viz_df,
-                x='relevanz',
-                color='category',
-                title="Verteilung der Relevanz-Bewertungen",
-                nbins=10,
-                color_discrete_map=category_colors
-            )
-            fig_rel.update_layout(height=400)
-            st.plotly_chart(fig_rel, use_container_width=True)
-
-        with col2:
-            # Dringlichkeit-Verteilung
-            fig_dring = px.histogram(
-                viz_df,
-                x='dringlichkeit',
-                color='category',
-                title="Verteilung der Dringlichkeits-Bewertungen",
-                nbins=10,
-                color_discrete_map=category_colors
-            )
-            fig_dring.update_layout(height=400)
-            st.plotly_chart(fig_dring, use_container_width=True)
-
-    with tab3:
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.subheader("🔝 Top Prioritäten")
-            viz_df['priority_score'] = viz_df['relevanz'] * viz_df['dringlichkeit']
-            top_items = viz_df.nlargest(10, 'priority_score')[
-                ['name', 'category', 'relevanz', 'dringlichkeit', 'priority_score']]
-            st.dataframe(top_items.round(2), use_container_width=True)
-
-        with col2:
-            st.subheader("📉 Niedrige Prioritäten")
-            low_items = viz_df.nsmallest(10, 'priority_score')[
-                ['name', 'category', 'relevanz', 'dringlichkeit', 'priority_score']]
-            st.dataframe(low_items.round(2), use_container_width=True)
-
-    with tab4:
-        st.subheader("🎯 Konsistenz zwischen Quellen")
-
-        # Berechne Konsistenz-Metriken
-        consistency_data = []
-        for dp_name in selected_dp_names:
-            dp_data = viz_df[viz_df['name'] == dp_name]
-            if len(dp_data) > 1:
-                rel_std = dp_data['relevanz'].std()
-                dring_std = dp_data['dringlichkeit'].std()
-                consistency_data.append({
-                    'Design Principle': dp_name,
-                    'Anzahl Quellen': len(dp_data),
-                    'Relevanz Std': rel_std,
-                    'Dringlichkeit Std': dring_std,
-                    'Gesamt Konsistenz': (rel_std + dring_std) / 2
-                })
-
-        if consistency_data:
-            consistency_df = pd.DataFrame(consistency_data)
-            consistency_df = consistency_df.sort_values('Gesamt Konsistenz')
-
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.write("**🎯 Konsistenteste Bewertungen** (niedrige Standardabweichung)")
-                st.dataframe(consistency_df.head(10).round(2), use_container_width=True)
-
-            with col2:
-                st.write("**⚠️ Inkonsistenteste Bewertungen** (hohe Standardabweichung)")
-                st.dataframe(consistency_df.tail(10).round(2), use_container_width=True)
-        else:
-            st.info("Keine Konsistenz-Analyse möglich - nur eine Quelle pro Design Principle ausgewählt.")
+    detail_analysis(view)
 
     # Kategorie-Analyse
     st.markdown("---")
     st.subheader("🏷️ Kategorie-Analyse")
 
-    category_stats = viz_df.groupby('category').agg({
-        'relevanz': ['mean', 'std', 'count'],
-        'dringlichkeit': ['mean', 'std']
-    }).round(2)
-
-    category_stats.columns = ['Relevanz_Mittel', 'Relevanz_Std', 'Anzahl', 'Dringlichkeit_Mittel', 'Dringlichkeit_Std']
-    st.dataframe(category_stats, use_container_width=True)
+    with stage('category_stats'):
+        category_stats = view.category_stats
+        st.dataframe(category_stats, use_container_width=True)
 
 else:
     st.warning("⚠️ Keine Daten für die gewählten Filter verfügbar. Bitte passen Sie Ihre Auswahl an.")
@@ -428,22 +457,53 @@ st.sidebar.markdown("---")
 st.sidebar.subheader("📥 Export")
 
 if not viz_df.empty:
-    csv = viz_df.to_csv(index=False)
-    st.sidebar.download_button(
-        label="📊 Daten als CSV herunterladen",
-        data=csv,
-        file_name='design_principles_analysis.csv',
-        mime='text/csv'
+    with st.sidebar:
+        export_panel(view)
+
+# Cache-Statistik
+cache_stats = result_cache.stats()
+st.sidebar.caption(
+    f"🗄️ Ergebnis-Cache: {cache_stats['entries']}/{cache_stats['maxsize']} Einträge, "
+    f"{cache_stats['bytes'] / 1024 ** 2:.0f}/{cache_stats['max_bytes'] / 1024 ** 2:.0f} MB (geschätzt), "
+    f"{cache_stats['hits']} Treffer, {cache_stats['misses']} Neuberechnungen"
+)
+
+# Speicherbedarf
+with st.sidebar.expander("💾 Speicherbedarf"):
+    memory_panel(view)
+
+# Messung der Verarbeitungsschritte (wirkt ab dem nächsten Lauf)
+with st.sidebar.expander("🐞 Messung"):
+    instrumentation_enabled = st.checkbox(
+        "Laufzeit und Speicher je Schritt messen",
+        key='instrumentation_enabled',
+        help="Speicherspitzen über tracemalloc, das jede Allokation verlangsamt"
     )
+    log_enabled = st.checkbox(f"In Logdatei schreiben ({stage_log_path.name})", key='instrumentation_log')
+    if recorder is not None:
+        st.dataframe(recorder.table().round(2), use_container_width=True, hide_index=True)
+        st.caption(f"Gesamt: {recorder.total_seconds() * 1000:.0f} ms (Messwerte dieses Laufs)")
+        if log_enabled:
+            log_stages(recorder)
+        fragment_recorder = st.session_state.get('fragment_recorder')
+        if fragment_recorder is not None:
+            st.caption("Letzter Lauf nur eines Fragments (Export, Detailansicht, Speicherbedarf):")
+            st.dataframe(fragment_recorder.table().round(2), use_container_width=True, hide_index=True)
+    elif not instrumentation_enabled:
+        stop_memory_tracing()
+finish_recording()
 
 # Informationen
 st.sidebar.markdown("---")
-st.sidebar.info("""
+st.sidebar.info(f"""
 **ℹ️ Hinweise zur Nutzung:**
 
-- **Datenquellen**: Wählen Sie Workshop und/oder Interviews (I1-I5)
-- **Design Principles**: Filtern Sie nach spezifischen DPs (32 verfügbar)
-- **Durchschnittswerte**: Für aggregierte Sichten
+- **Datenquellen**: Wählen Sie aus {len(ratings.sources)} Quellen ({', '.join(map(source_label, ratings.sources))})
+- **Design Principles**: Filtern Sie nach spezifischen DPs ({len(df)} verfügbar)
+- **Durchschnittswerte**: Für aggregierte Sichten, Quellen über die Quellengewichte gewichtbar
+- **Dichteansicht**: Punktdichte je Rasterzelle für sehr viele Bewertungen
+- **Entwicklung**: Animation der Durchschnittswerte, Quelle für Quelle
+- **Quadranten**: Grenzen fest oder aus Median/Mittelwert, Zuordnung in der Detailanalyse
 - **Hovering**: Zeigt alle Quellen mit gleichen Werten
 - **Punktgröße**: Größere Punkte = mehr übereinstimmende Quellen
 - **Konsistenz**: Neue Analyse der Bewertungsunterschiede
@@ -453,12 +513,12 @@ st.sidebar.info("""
 # Footer
 st.markdown("---")
 st.markdown(
-    """
+    f"""
     <div style='text-align: center; color: gray;'>
     🔬 Design Principles Forschungsanalyse | 
     Entwickelt für Workshop- und Interview-Datenauswertung | 
     Erweitert mit DP-Filter, Interview 5 und verbessertem Hovering | 
-    📊 Jetzt mit 32 Design Principles
+    📊 Jetzt mit {len(df)} Design Principles
     </div>
     """,
     unsafe_allow_html=True
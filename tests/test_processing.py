@@ -0,0 +1,158 @@
+"""Gleichwertigkeit von prepare_visualization_data mit der früheren iterrows-Implementierung.
+
+Die Referenz ist die ursprüngliche Schleife aus streamlit_app.py, ergänzt nur
+um das Überspringen fehlender und unvollständiger Bewertungspaare (NaN), wie
+es seit der Umstellung auf die Präsenzmaske gilt. Verglichen wird für jede
+Teilmenge der Quellen in beiden Darstellungsmodi.
+"""
+import itertools
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmark import synthetic_design_principles  # noqa: E402
+from data import design_principles_data  # noqa: E402
+from processing import (compact_design_principles, discover_sources, prepare_visualization_data,  # noqa: E402
+                        ratings_from_wide, source_label)
+from storage import response_schema  # noqa: E402
+
+show_modes = ["Einzelne Datenpunkte", "Durchschnittswerte"]
+
+
+def reference_visualization_data(df, selected_sources, show_mode, selected_categories, selected_dp_names):
+    """Frühere Implementierung (eine Python-Schleife je DP und Quelle)"""
+    filtered_df = df[
+        (df['category'].isin(selected_categories)) &
+        (df['name'].isin(selected_dp_names))
+    ]
+
+    plot_data = []
+    for _, row in filtered_df.iterrows():
+        if show_mode == "Durchschnittswerte":
+            relevanz_values = []
+            dringlichkeit_values = []
+            sources_used = []
+
+            for source in selected_sources:
+                rel_col = f"{source}_relevanz"
+                dring_col = f"{source}_dringlichkeit"
+
+                if rel_col in row and pd.notna(row[rel_col]) and pd.notna(row[dring_col]):
+                    relevanz_values.append(row[rel_col])
+                    dringlichkeit_values.append(row[dring_col])
+                    sources_used.append(source_label(source))
+
+            if relevanz_values:
+                plot_data.append({
+                    'name': row['name'],
+                    'category': row['category'],
+                    'relevanz': np.mean(relevanz_values),
+                    'dringlichkeit': np.mean(dringlichkeit_values),
+                    'source': f"Durchschnitt ({', '.join(sources_used)})",
+                    'sources_list': sources_used
+                })
+        else:
+            for source in selected_sources:
+                rel_col = f"{source}_relevanz"
+                dring_col = f"{source}_dringlichkeit"
+
+                if rel_col in row and pd.notna(row[rel_col]) and pd.notna(row[dring_col]):
+                    plot_data.append({
+                        'name': row['name'],
+                        'category': row['category'],
+                        'relevanz': row[rel_col],
+                        'dringlichkeit': row[dring_col],
+                        'source': source_label(source),
+                        'sources_list': [source_label(source)]
+                    })
+
+    return pd.DataFrame(plot_data, columns=['name', 'category', 'relevanz', 'dringlichkeit', 'source',
+                                            'sources_list'])
+
+
+def _comparable(viz_df):
+    """Categoricals und float32 auf einfache Typen bringen, Quelllisten als Tupel"""
+    return pd.DataFrame({
+        'name': viz_df['name'].astype(str).to_numpy(),
+        'category': viz_df['category'].astype(str).to_numpy(),
+        'relevanz': viz_df['relevanz'].to_numpy(dtype=float),
+        'dringlichkeit': viz_df['dringlichkeit'].to_numpy(dtype=float),
+        'source': viz_df['source'].astype(str).to_numpy(),
+        'sources_list': [tuple(sources) for sources in viz_df['sources_list']]
+    })
+
+
+def _corpora():
+    raw = pd.DataFrame(design_principles_data)
+    synthetic = synthetic_design_principles(60, 5, density=0.6, seed=1)
+    # Unvollständige Paare: nur einer der beiden Werte vorhanden
+    synthetic.loc[::7, 'I1_dringlichkeit'] = None
+    synthetic.loc[3::11, 'I3_relevanz'] = None
+    return {'data.py': raw, 'synthetisch': synthetic}
+
+
+@pytest.mark.parametrize('corpus', ['data.py', 'synthetisch'])
+@pytest.mark.parametrize('show_mode', show_modes)
+def test_matches_iterrows_reference_for_every_source_subset(corpus, show_mode):
+    raw = _corpora()[corpus]
+    # Die Referenz arbeitet auf den breiten Spalten, None als NaN wie nach pd.DataFrame(...)
+    wide = raw.apply(lambda column: pd.to_numeric(column) if column.name.endswith(('_relevanz', '_dringlichkeit'))
+                     else column)
+    df, ratings = compact_design_principles(raw), ratings_from_wide(raw)
+    sources = discover_sources(raw.columns)
+    categories = raw['category'].unique().tolist()
+    names = raw['name'].unique().tolist()
+
+    for size in range(1, len(sources) + 1):
+        for subset in itertools.combinations(sources, size):
+            subset = list(subset)
+            expected = reference_visualization_data(wide, subset, show_mode, categories, names)
+            actual = prepare_visualization_data(df, subset, show_mode, categories, names, ratings)
+            pd.testing.assert_frame_equal(_comparable(actual), _comparable(expected), rtol=1e-5,
+                                          obj=f"{show_mode} {subset}")
+
+
+@pytest.mark.parametrize('show_mode', show_modes)
+def test_matches_iterrows_reference_with_category_and_dp_filters(show_mode):
+    raw = _corpora()['data.py']
+    wide = raw.apply(lambda column: pd.to_numeric(column) if column.name.endswith(('_relevanz', '_dringlichkeit'))
+                     else column)
+    df, ratings = compact_design_principles(raw), ratings_from_wide(raw)
+    sources = discover_sources(raw.columns)
+    rng = np.random.default_rng(0)
+    categories = raw['category'].unique().tolist()
+    names = raw['name'].unique().tolist()
+
+    for _ in range(20):
+        selected_categories = [c for c in categories if rng.random() < 0.6]
+        selected_names = [n for n in names if rng.random() < 0.7]
+        expected = reference_visualization_data(wide, sources, show_mode, selected_categories, selected_names)
+        actual = prepare_visualization_data(df, sources, show_mode, selected_categories, selected_names, ratings)
+        pd.testing.assert_frame_equal(_comparable(actual), _comparable(expected), rtol=1e-5)
+
+
+def test_responses_outside_the_filter_leave_the_averaged_entries():
+    raw = _corpora()['data.py']
+    df, ratings = compact_design_principles(raw), ratings_from_wide(raw)
+    sources = discover_sources(raw.columns)
+    categories = raw['category'].unique().tolist()
+    names = raw['name'].unique().tolist()
+    expected = prepare_visualization_data(df, sources[1:], show_modes[0], categories, names, ratings)
+
+    empty = response_schema.empty_table().to_pandas()
+    # Antworten nur für die abgewählte erste Quelle
+    deselected = pd.DataFrame({
+        'dp_id': np.arange(3, dtype=np.int32),
+        'source': pd.Categorical([sources[0]] * 3),
+        'respondent': ['P1', 'P2', 'P3'],
+        'relevanz': np.float32([5, 6, 7]),
+        'dringlichkeit': np.float32([4, 5, 6])
+    })
+    for responses in (empty, deselected):
+        actual = prepare_visualization_data(df, sources[1:], show_modes[0], categories, names, ratings, responses)
+        pd.testing.assert_frame_equal(_comparable(actual), _comparable(expected))
@@ -0,0 +1,84 @@
+"""Geteilter Ergebnis-Cache: Speicherrahmen und gemeinsame Berechnung gleichzeitiger Fehlschläge."""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from result_cache import ResultCache, estimated_bytes  # noqa: E402
+
+
+def test_entries_are_evicted_by_estimated_bytes():
+    value = np.zeros(1000)
+    cache = ResultCache(maxsize=64, max_bytes=3 * value.nbytes)
+    for key in range(5):
+        cache.put(key, value.copy())
+    stats = cache.stats()
+    assert stats['entries'] == 3 and stats['bytes'] <= stats['max_bytes']
+    assert cache.get(0) is None and cache.get(4) is not None
+
+
+def test_growing_entries_are_remeasured_on_hit():
+    tables = {}
+
+    class Growing:
+        def estimated_bytes(self):
+            return estimated_bytes(list(tables.values()))
+
+    cache = ResultCache(maxsize=64, max_bytes=10_000)
+    cache.put('small', np.zeros(100))
+    cache.put('view', Growing())
+    tables['grouped'] = np.zeros(2000)
+    assert cache.get('view') is not None
+    # Der gewachsene Eintrag verdrängt den älteren, bleibt selbst aber erhalten
+    assert cache.get('small') is None and cache.stats()['entries'] == 1
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'view'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute)))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['view'] * 6
+    assert len(calls) == 1 and cache.stats()['shared'] == 5
+
+
+def test_waiters_recompute_after_a_failed_computation():
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        if len(calls) == 1:
+            raise RuntimeError("abgebrochen")
+        return 'view'
+
+    results = []
+
+    def request():
+        try:
+            results.append(cache.get_or_compute('key', compute))
+        except RuntimeError as error:
+            results.append(str(error))
+
+    threads = [threading.Thread(target=request) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == ['abgebrochen', 'view', 'view'] and len(calls) == 2
@@ -0,0 +1,95 @@
+"""Fortschreiben des Datenstands: angehängte Teile ergeben dasselbe wie ein vollständiger Neuaufbau.
+
+Ein synthetischer Korpus wird auf mehrere Bewertungsteile verteilt (weitere
+Einträge bestehender Quellen, neue Quellen, neue Design Principles). Nach jedem
+Nachladen müssen Einträge, Teilmengen-Würfel, Entwicklungs-Frames und Momente
+des `DatasetStore` mit einem frisch gelesenen Datensatz übereinstimmen.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmark import synthetic_design_principles  # noqa: E402
+from processing import decode_ratings, ratings_from_wide, ratings_moments  # noqa: E402
+from storage import DatasetStore, read_dataset, write_design_principles, write_rating_rows  # noqa: E402
+
+rating_fields = ['dp_id', 'source_id', 'relevanz', 'dringlichkeit', 'source_counts']
+
+
+def _write_entries(full, entries, path, part_sources=None):
+    sources = np.asarray(full.sources, dtype=object)
+    return write_rating_rows(full.dp_id[entries], sources[full.source_id[entries]],
+                             decode_ratings(full.relevanz[entries]), decode_ratings(full.dringlichkeit[entries]),
+                             path, part_sources)
+
+
+def _assert_same_state(state, df, ratings):
+    assert state.df['name'].astype(str).tolist() == df['name'].astype(str).tolist()
+    assert state.ratings.sources == ratings.sources
+    assert state.ratings.n_dp == ratings.n_dp
+    for field in rating_fields:
+        np.testing.assert_array_equal(getattr(state.ratings, field), getattr(ratings, field), err_msg=field)
+
+    assert state.ratings.cube is not None and ratings.cube is not None
+    np.testing.assert_array_equal(state.ratings.cube.sums, ratings.cube.sums)
+    np.testing.assert_array_equal(state.ratings.cube.counts, ratings.cube.counts)
+    assert state.ratings.evolution is not None and ratings.evolution is not None
+    np.testing.assert_array_equal(state.ratings.evolution.sums, ratings.evolution.sums)
+    np.testing.assert_array_equal(state.ratings.evolution.counts, ratings.evolution.counts)
+
+    moments = ratings_moments(ratings)
+    np.testing.assert_array_equal(state.moments.count, moments.count)
+    np.testing.assert_allclose(state.moments.mean, moments.mean)
+    np.testing.assert_allclose(state.moments.m2, moments.m2, atol=1e-9)
+
+
+def _reopened(path):
+    state = DatasetStore.open(path).state
+    return state.df, state.ratings
+
+
+def test_appended_parts_match_a_full_rebuild(tmp_path):
+    raw = synthetic_design_principles(80, 6, density=0.6, seed=2)
+    full = ratings_from_wide(raw)
+    old_dp, old_source = full.dp_id < 60, full.source_id < 4
+    first_half = np.random.default_rng(0).random(len(full.dp_id)) < 0.5
+
+    # Ausgangsstand: 60 DPs, 4 Quellen, nur ein Teil der Einträge
+    write_design_principles(raw.iloc[:60], tmp_path)
+    _write_entries(full, np.flatnonzero(old_dp & old_source & first_half), tmp_path, full.sources[:4])
+    store = DatasetStore.open(tmp_path)
+    _assert_same_state(store.state, *read_dataset(tmp_path))
+
+    batches = [
+        # Weitere Einträge bestehender Quellen und DPs (Frames ab einer mittleren Quelle neu)
+        old_dp & old_source & ~first_half,
+        # Neue Quelle für bestehende DPs
+        old_dp & (full.source_id == 4),
+        # Neue DPs für alle Quellen und eine weitere neue Quelle
+        ~old_dp | (full.source_id == 5)
+    ]
+    for version, batch in enumerate(batches, start=1):
+        if (~old_dp & batch).any():
+            write_design_principles(raw, tmp_path)
+        _write_entries(full, np.flatnonzero(batch), tmp_path)
+        state = store.refresh()
+        assert state.version == version
+
+        df, ratings = read_dataset(tmp_path)
+        _assert_same_state(state, df, ratings)
+        _assert_same_state(state, *_reopened(tmp_path))
+
+    _assert_same_state(store.state, raw, full)
+
+
+def test_refresh_without_new_parts_keeps_the_state(tmp_path):
+    raw = synthetic_design_principles(20, 3, density=0.7, seed=4)
+    full = ratings_from_wide(raw)
+    write_design_principles(raw, tmp_path)
+    _write_entries(full, np.arange(len(full.dp_id)), tmp_path)
+    store = DatasetStore.open(tmp_path)
+    assert store.refresh() is store.state
+    assert store.state.version == 0